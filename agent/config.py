@@ -1,6 +1,8 @@
 from pathlib import Path
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 from typing import Optional
+import re
+from .utils import compile_patterns
 
 class AgentConfig(BaseModel):
     project_root: Path = Field(..., description="Absolute path to the repo root the agent is jailed to.")
@@ -16,10 +18,33 @@ class AgentConfig(BaseModel):
     deepseek_api_key: Optional[str] = Field(None, description="DeepSeek API key for LLM integration")
     deepseek_base_url: str = Field("https://api.deepseek.com", description="DeepSeek API base URL")
     deepseek_model: str = Field("deepseek-coder", description="DeepSeek model to use")
+    deepseek_model_fast: str = Field("deepseek-chat", description="Faster DeepSeek model for small edits")
+    cache_enabled: bool = Field(True, description="Cache LLM diffs on disk under backup_dir/.llm_cache")
+
+    _allow_re: Optional[re.Pattern] = PrivateAttr(None)
+    _deny_re: Optional[re.Pattern] = PrivateAttr(None)
+
+    @property
+    def allow_re(self) -> re.Pattern:
+        if self._allow_re is None:
+            self._allow_re = compile_patterns(self.allow_patterns)
+        return self._allow_re
+
+    @property
+    def deny_re(self) -> re.Pattern:
+        if self._deny_re is None:
+            self._deny_re = compile_patterns(self.deny_patterns)
+        return self._deny_re
+
+    @property
+    def llm_cache_dir(self) -> Path | None:
+        return self.backup_dir / ".llm_cache" if self.cache_enabled and self.backup_dir else None
 
     def resolve(self):
         self.project_root = self.project_root.resolve()
         if self.backup_dir is None:
             self.backup_dir = self.project_root / ".ai_agent_backups"
         self.backup_dir.mkdir(parents=True, exist_ok=True)
+        self._allow_re = compile_patterns(self.allow_patterns)
+        self._deny_re = compile_patterns(self.deny_patterns)
         return self
@@ -1,82 +1,251 @@
 from __future__ import annotations
 from dataclasses import dataclass
+from pathlib import Path
+import asyncio
+from collections import OrderedDict
+import difflib
+import hashlib
+import importlib.util
+import json
 import os
+import re
+import time
 
-# Load environment variables from .env file
-try:
-    from dotenv import load_dotenv
-    load_dotenv()
-except ImportError:
-    pass  # python-dotenv not installed, skip loading
+# Load environment variables from .env file (AGENT_LOAD_DOTENV=0 skips the lookup, e.g. in containers)
+if os.environ.get("AGENT_LOAD_DOTENV", "1") == "1":
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass  # python-dotenv not installed, skip loading
 import logging
-from openai import OpenAI
-from typing import Optional
+import httpx
+from openai import AsyncOpenAI, OpenAI
+from typing import Callable, Optional
+from .utils import atomic_write
+
+# upper bound on in-flight requests for generate_unified_diff_batch
+BATCH_CONCURRENCY = 16
+# HTTP/2 needs the optional h2 package (pip install httpx[http2])
+HTTP2 = importlib.util.find_spec("h2") is not None
+HTTP_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=32)
+HTTP_TIMEOUT = httpx.Timeout(60.0)
+# diffs kept in memory per LLM instance, in front of the on-disk cache
+MEMO_SIZE = 256
+# cached diffs older than this are ignored and regenerated
+CACHE_TTL_SECONDS = 7 * 24 * 3600
+# line-comment prefix per extension for the fallback TODO; anything else gets "//"
+LINE_COMMENTS = {
+    ".py": "#", ".sh": "#", ".rb": "#", ".pl": "#", ".r": "#",
+    ".yml": "#", ".yaml": "#", ".toml": "#", ".sql": "--", ".lua": "--",
+}
 
 @dataclass
 class EditInstruction:
     goal: str
     context: str  # file content or snippet
 
+# files up to this many lines are always sent whole
+WINDOW_MIN_LINES = 200
+# when no identifier from the goal is found, send at most this many lines
+MAX_PROMPT_LINES = 400
+# edits under both limits go to the faster chat model
+FAST_MAX_TEXT = 2000
+FAST_MAX_GOAL = 80
+# diff replies are capped at this many tokens; small files get a proportionally smaller cap
+MAX_DIFF_TOKENS = 2000
+_IDENT_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]{2,}")
+
+def _window(old_text: str, goal: str, lines_before: int = 40, lines_after: int = 40) -> tuple[str, int]:
+    """
+    Pick the part of old_text worth sending for this goal.
+    Returns (snippet, 1-based start line). Small files are returned whole, minus trailing
+    blank lines; larger ones are cut around the first identifier from the goal found in
+    the file, or capped at MAX_PROMPT_LINES when none is found.
+    """
+    lines = old_text.split("\n")
+    while lines and not lines[-1].strip():
+        lines.pop()
+    if len(lines) <= WINDOW_MIN_LINES:
+        return "\n".join(lines), 1
+
+    # code-looking words first (snake_case, camelCase, digits), then longer plain words
+    words = _IDENT_RE.findall(goal)
+    words.sort(key=lambda w: (not ("_" in w or any(c.isdigit() for c in w) or w[1:] != w[1:].lower()), -len(w)))
+    for word in words:
+        m = re.search(rf"\b{re.escape(word)}\b", old_text)
+        if m:
+            hit = old_text.count("\n", 0, m.start())
+            start = max(0, hit - lines_before)
+            return "\n".join(lines[start:hit + lines_after + 1]), start + 1
+    return "\n".join(lines[:MAX_PROMPT_LINES]), 1
+
 class LLM:
     """
     DeepSeek API integration for generating unified diffs and text generation.
     Uses OpenAI-compatible API format.
     """
-    def __init__(self, api_key: Optional[str] = None, base_url: str = "https://api.deepseek.com"):
+    def __init__(self, api_key: Optional[str] = None, base_url: str = "https://api.deepseek.com",
+                 cache_dir: Optional[Path] = None, model: str = "deepseek-coder",
+                 fast_model: str = "deepseek-chat"):
         self.api_key = api_key or os.getenv("DEEPSEEK_API_KEY")
+        self.base_url = base_url
+        self.model = model
+        self.fast_model = fast_model
+        self.cache_dir = cache_dir  # None disables the on-disk response cache
+        self._memo: OrderedDict[str, str] = OrderedDict()
+        self._http = None
         if not self.api_key:
             logging.warning("DEEPSEEK_API_KEY not found. LLM will use fallback mode.")
             self.client = None
         else:
+            # one pooled keep-alive client per LLM, so repeated requests reuse the TLS connection
+            self._http = httpx.Client(
+                http2=HTTP2,
+                limits=HTTP_LIMITS,
+                timeout=HTTP_TIMEOUT,
+                transport=httpx.HTTPTransport(http2=HTTP2, limits=HTTP_LIMITS, retries=2),
+            )
             self.client = OpenAI(
                 api_key=self.api_key,
-                base_url=base_url
+                base_url=base_url,
+                http_client=self._http
             )
+
+    def close(self) -> None:
+        """
+        Release pooled HTTP connections.
+        """
+        if self._http is not None:
+            self._http.close()
+            self._http = None
         
-    def generate_unified_diff(self, filename: str, old_text: str, instruction: EditInstruction) -> str:
+    def generate_unified_diff(self, filename: str, old_text: str, instruction: EditInstruction,
+                              on_token: Optional[Callable[[str], None]] = None) -> str:
         """
         Generate a unified diff using DeepSeek API.
+        The response is streamed; each content delta is passed to on_token as it arrives.
         Falls back to simple comment injection if API is not available.
         """
+        key = self._cache_key(filename, old_text, instruction)
+        cached = self._cache_get(key)
+        if cached is not None:
+            if on_token:
+                on_token(cached)
+            return cached
+
         if not self.client:
             # Fallback mode when API key is not available
             return self._fallback_diff(filename, old_text, instruction)
         
         try:
-            prompt = f"""You are a code editor assistant. Generate a unified diff to modify the following code according to the instruction.
+            stream = self.client.chat.completions.create(
+                **self._diff_request(filename, old_text, instruction), stream=True)
+            buf = []
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                token = chunk.choices[0].delta.content
+                if token:
+                    buf.append(token)
+                    if on_token:
+                        on_token(token)
+            diff = "".join(buf).strip()
+            self._cache_put(key, diff)
+            return diff
+            
+        except Exception as e:
+            logging.error(f"DeepSeek API error: {e}")
+            return self._fallback_diff(filename, old_text, instruction)
+
+    async def generate_unified_diff_batch(self, jobs: list[tuple[str, str, EditInstruction]],
+                                          concurrency: int = BATCH_CONCURRENCY) -> list[str]:
+        """
+        Generate unified diffs for several (filename, old_text, instruction) jobs concurrently.
+        Results are returned in job order; failed jobs fall back individually.
+        """
+        if not self.client:
+            return [self._fallback_diff(*job) for job in jobs]
+
+        sem = asyncio.Semaphore(concurrency)
+        # the async client is tied to the running event loop, so it lives for one batch
+        http = httpx.AsyncClient(
+            http2=HTTP2,
+            limits=HTTP_LIMITS,
+            timeout=HTTP_TIMEOUT,
+            transport=httpx.AsyncHTTPTransport(http2=HTTP2, limits=HTTP_LIMITS, retries=2),
+        )
+        async with AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, http_client=http) as client:
+            async def one(filename: str, old_text: str, instruction: EditInstruction) -> str:
+                key = self._cache_key(filename, old_text, instruction)
+                cached = self._cache_get(key)
+                if cached is not None:
+                    return cached
+                async with sem:
+                    try:
+                        response = await client.chat.completions.create(
+                            **self._diff_request(filename, old_text, instruction))
+                        diff = response.choices[0].message.content.strip()
+                        self._cache_put(key, diff)
+                        return diff
+                    except Exception as e:
+                        logging.error(f"DeepSeek API error: {e}")
+                        return self._fallback_diff(filename, old_text, instruction)
+
+            return await asyncio.gather(*(one(*job) for job in jobs))
+
+    def generate_unified_diff_many(self, jobs: list[tuple[str, str, EditInstruction]]) -> list[str]:
+        """
+        Synchronous wrapper around generate_unified_diff_batch for non-async callers.
+        """
+        return asyncio.run(self.generate_unified_diff_batch(jobs))
+
+    def _choose_model(self, instruction: EditInstruction, old_text: str) -> str:
+        """
+        Pick the faster chat model for small files with short instructions.
+        """
+        if len(old_text) < FAST_MAX_TEXT and len(instruction.goal) < FAST_MAX_GOAL:
+            return self.fast_model
+        return self.model
+
+    def _diff_request(self, filename: str, old_text: str, instruction: EditInstruction) -> dict:
+        """
+        Build the chat.completions.create() arguments for a diff request.
+        """
+        snippet, start = _window(old_text, instruction.goal)
+        end = start + len(snippet.splitlines()) - 1
+        total = len(old_text.splitlines())
+        # EditTool passes the file itself as context; don't send it twice
+        context = "" if instruction.context == old_text else f"Context: {instruction.context}\n"
+        prompt = f"""You are a code editor assistant. Generate a unified diff to modify the following code according to the instruction.
 
 Filename: {filename}
 Instruction: {instruction.goal}
-Context: {instruction.context}
-
-Original code:
+{context}
+Original code (lines {start}-{end} of {total}):
 ```
-{old_text}
+{snippet}
 ```
 
 Generate a unified diff format that shows the changes needed. The diff should:
 1. Use proper unified diff format with --- and +++ headers
-2. Show line numbers and context
+2. Use the file's real line numbers in the @@ hunk headers (the excerpt starts at line {start})
 3. Only include the minimal changes needed
 4. Be syntactically correct for the file type
 
 Return ONLY the unified diff, no explanations."""
 
-            response = self.client.chat.completions.create(
-                model="deepseek-coder",
-                messages=[
-                    {"role": "system", "content": "You are a precise code editor that generates unified diffs."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.1,
-                max_tokens=2000
-            )
-            
-            return response.choices[0].message.content.strip()
-            
-        except Exception as e:
-            logging.error(f"DeepSeek API error: {e}")
-            return self._fallback_diff(filename, old_text, instruction)
+        return dict(
+            model=self._choose_model(instruction, old_text),
+            messages=[
+                {"role": "system", "content": "You are a precise code editor that generates unified diffs."},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.1,
+            # no stop=["```"]: a reply that opens with a ```diff fence would stop at its first
+            # token, and diffs of Markdown files legitimately contain fences
+            max_tokens=min(MAX_DIFF_TOKENS, len(old_text) // 2 + 256)
+        )
     
     def generate_text(self, prompt: str, system_prompt: str = "You are a helpful AI assistant.") -> str:
         """
@@ -102,13 +271,53 @@ Return ONLY the unified diff, no explanations."""
             logging.error(f"DeepSeek API error: {e}")
             return f"Error: {str(e)}"
     
+    @staticmethod
+    def _cache_key(filename: str, old_text: str, instruction: EditInstruction) -> str:
+        h = hashlib.blake2b(f"{filename}\0{instruction.goal}\0".encode(), digest_size=32)
+        h.update(old_text.encode())
+        return h.hexdigest()
+
+    def _memo_put(self, key: str, content: str) -> None:
+        self._memo[key] = content
+        self._memo.move_to_end(key)
+        if len(self._memo) > MEMO_SIZE:
+            self._memo.popitem(last=False)
+
+    def _cache_get(self, key: str) -> Optional[str]:
+        hit = self._memo.get(key)
+        if hit is not None:
+            self._memo.move_to_end(key)
+            return hit
+        if self.cache_dir is None:
+            return None
+        path = self.cache_dir / f"{key}.json"
+        try:
+            if time.time() - path.stat().st_mtime > CACHE_TTL_SECONDS:
+                return None
+            content = json.loads(path.read_text(encoding="utf-8"))["content"]
+        except (OSError, ValueError, KeyError):
+            return None
+        self._memo_put(key, content)
+        return content
+
+    def _cache_put(self, key: str, content: str) -> None:
+        if not content:
+            return
+        self._memo_put(key, content)
+        if self.cache_dir is None:
+            return
+        try:
+            atomic_write(self.cache_dir / f"{key}.json", json.dumps({"content": content}).encode("utf-8"))
+        except OSError as e:
+            logging.warning(f"LLM cache write failed: {e}")
+
     def _fallback_diff(self, filename: str, old_text: str, instruction: EditInstruction) -> str:
         """
         Fallback implementation when API is not available.
+        Appends a TODO comment as a real difflib unified diff, so it applies cleanly.
         """
-        return f"""--- a/{filename}
-+++ b/{filename}
-@@ -1,{len(old_text.splitlines())} +1,{len(old_text.splitlines()) + 1} @@
- {old_text.rstrip()}
-+// TODO: {instruction.goal}
-"""
+        comment = LINE_COMMENTS.get(Path(filename).suffix.lower(), "//")
+        old_lines = old_text.splitlines()
+        new_lines = old_lines + [f"{comment} TODO: {instruction.goal}"]
+        diff = difflib.unified_diff(old_lines, new_lines, fromfile=f"a/{filename}", tofile=f"b/{filename}", lineterm="")
+        return "\n".join(diff) + "\n"
@@ -1,10 +1,19 @@
 from __future__ import annotations
 from pathlib import Path
-import io, difflib
+from typing import Callable, Optional
+import difflib, subprocess, tempfile
 from ..config import AgentConfig
 from ..utils import jail_path, backup_file, atomic_write
 from ..llm import LLM, EditInstruction
 
+try:
+    from unidiff import PatchSet
+    from unidiff.errors import UnidiffParseError
+except ImportError:
+    PatchSet = None  # unidiff not installed, fall back to `patch` / naive rebuild
+
+_OUTSIDE_ROOT = {"ok": False, "error": "Permission denied: path outside project root"}
+
 class EditTool:
     def __init__(self, cfg: AgentConfig, llm: LLM):
         self.cfg = cfg
@@ -13,9 +22,10 @@ class EditTool:
     def apply_unified_diff(self, filename: str, diff_text: str) -> dict:
         # minimal unified-diff applier (single-file)
         try:
-            target = (self.cfg.project_root / filename).resolve()
-            if not str(target).startswith(str(self.cfg.project_root)):
-                return {"ok": False, "error": "Permission denied: path outside project root"}
+            try:
+                target = jail_path(self.cfg.project_root, filename)
+            except PermissionError:
+                return _OUTSIDE_ROOT.copy()
             
             if not target.exists():
                 old_lines = []
@@ -34,68 +44,160 @@ class EditTool:
         except Exception as e:
             return {"ok": False, "error": f"Failed to apply diff: {str(e)}"}
 
-    def suggest_and_apply(self, filename: str, goal: str) -> dict:
-        path = (self.cfg.project_root / filename).resolve()
+    def suggest_and_apply(self, filename: str, goal: str, on_token: Optional[Callable[[str], None]] = None) -> dict:
+        try:
+            path = jail_path(self.cfg.project_root, filename)
+        except PermissionError:
+            return _OUTSIDE_ROOT.copy()
         text = ""
         if path.exists():
             text = path.read_text(encoding="utf-8", errors="ignore")
-        diff = self.llm.generate_unified_diff(filename, text, EditInstruction(goal=goal, context=text))
+        diff = self.llm.generate_unified_diff(filename, text, EditInstruction(goal=goal, context=text), on_token=on_token)
         return self.apply_unified_diff(filename, diff)
 
+    def suggest_and_apply_many(self, edits: list[dict]) -> list[dict]:
+        # edits: [{"filename": ..., "goal": ...}, ...]; the LLM calls go out as one concurrent batch.
+        # Results come back in edit order; a path outside the project fails on its own
+        results: list[dict | None] = []
+        jobs = []
+        for e in edits:
+            try:
+                path = jail_path(self.cfg.project_root, e["filename"])
+            except PermissionError:
+                results.append(_OUTSIDE_ROOT.copy())
+                continue
+            text = path.read_text(encoding="utf-8", errors="ignore") if path.exists() else ""
+            jobs.append((e["filename"], text, EditInstruction(goal=e["goal"], context=text)))
+            results.append(None)
+        diffs = self.llm.generate_unified_diff_many(jobs) if jobs else []
+        applied = (self.apply_unified_diff(filename, diff) for (filename, _, _), diff in zip(jobs, diffs))
+        return [r if r is not None else next(applied) for r in results]
+
     def _patch(self, old_lines: list[str], diff_text: str) -> list[str] | None:
-        # very small unified diff parser; good enough for typical hunks
+        if not diff_text or not diff_text.strip():
+            return None
+        # 1) position-aware hunk application, 2) system `patch` (fuzz/offsets),
+        # 3) naive rebuild for header-less LLM output
+        patched = self._apply_hunks(old_lines, diff_text)
+        if patched is None:
+            patched = self._apply_with_patch(old_lines, diff_text)
+        if patched is None and not self._has_hunk_header(diff_text):
+            patched = self._rebuild(old_lines, diff_text)
+        # a real hunk that fits nowhere is a failure, not a whole-file rewrite
+        return patched
+
+    @staticmethod
+    def _has_hunk_header(diff_text: str) -> bool:
+        return diff_text.startswith("@@") or "\n@@" in diff_text
+
+    def _apply_hunks(self, old_lines: list[str], diff_text: str) -> list[str] | None:
+        if PatchSet is None:
+            return None
         try:
-            if not diff_text or not diff_text.strip():
+            patch_set = PatchSet(diff_text)
+        except UnidiffParseError:
+            return None
+        if len(patch_set) != 1:
+            return None
+        hunks = list(patch_set[0])
+        if not hunks:
+            return None
+
+        # fast path: a single hunk that rewrites the whole file
+        if len(hunks) == 1 and hunks[0].source_start <= 1 and hunks[0].source_length == len(old_lines):
+            return self._hunk_target(hunks[0])
+
+        new: list[str] = []
+        pos = 0
+        for hunk in hunks:
+            source = [l.value for l in hunk if l.is_context or l.is_removed]
+            # a zero-length source range means "insert after line source_start"
+            start = hunk.source_start if hunk.source_length == 0 else hunk.source_start - 1
+            start = self._locate(old_lines, source, max(start, pos), pos)
+            if start is None:
                 return None
-                
-            patched = old_lines[:]
-            s = io.StringIO(diff_text)
-            # skip header lines
-            while True:
-                line = s.readline()
-                if not line:
-                    break
-                if line.startswith('@@'):
-                    # start hunk
-                    break
-            if not line:
-                # No hunk found, try to rebuild from entire diff
-                s.seek(0)
-                new = []
-                for l in s.readlines():
-                    if l.startswith('@@'):
-                        continue
-                    if l.startswith('+') and not l.startswith('+++'):
-                        new.append(l[1:])
-                    elif l.startswith('-') and not l.startswith('---'):
-                        # skip removed line
-                        continue
-                    elif l.startswith('\\ No newline'):
-                        continue
-                    else:
-                        if l.startswith('---') or l.startswith('+++'):
-                            continue
-                        new.append(l[1:] if l.startswith(' ') else l)
-                return new if new else None
-                
-            # naive: rebuild from diff body
-            new = []
-            # Rewind one hunk header line processed
-            body = [line] + s.readlines()
-            for l in body:
-                if l.startswith('@@'):
-                    continue
-                if l.startswith('+') and not l.startswith('+++'):
-                    new.append(l[1:])
-                elif l.startswith('-') and not l.startswith('---'):
-                    # skip removed line
-                    continue
-                elif l.startswith('\\ No newline'):
-                    continue
-                else:
-                    if l.startswith('---') or l.startswith('+++'):
-                        continue
-                    new.append(l[1:] if l.startswith(' ') else l)
-            return new
-        except Exception:
+            new.extend(old_lines[pos:start])
+            new.extend(self._hunk_target(hunk))
+            pos = start + len(source)
+        new.extend(old_lines[pos:])
+        return new
+
+    @staticmethod
+    def _hunk_target(hunk) -> list[str]:
+        out: list[str] = []
+        last_kept = False
+        for l in hunk:
+            if l.is_added or l.is_context:
+                out.append(l.value)
+                last_kept = True
+            elif l.is_removed:
+                last_kept = False
+            elif last_kept and out:  # "\ No newline at end of file"
+                out[-1] = out[-1].rstrip("\r\n")
+        return out
+
+    @staticmethod
+    def _locate(old_lines: list[str], source: list[str], hint: int, lo: int) -> int | None:
+        # find `source` in old_lines at or after `lo`, preferring the spot closest to `hint`
+        n = len(source)
+        want = [l.rstrip("\r\n") for l in source]
+
+        def matches(i: int) -> bool:
+            return all(old_lines[i + j].rstrip("\r\n") == want[j] for j in range(n))
+
+        last = len(old_lines) - n
+        if hint > last + 1 or hint < lo:
+            hint = lo
+        for delta in range(max(hint - lo, last - hint) + 1):
+            for i in (hint - delta, hint + delta):
+                if lo <= i <= last and matches(i):
+                    return i
+        return None
+
+    def _apply_with_patch(self, old_lines: list[str], diff_text: str) -> list[str] | None:
+        # let GNU/BSD patch deal with fuzz and offsets; it works on a scratch copy
+        # so backups and atomic_write stay in charge of the real file
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                src = Path(tmp) / "src"
+                out = Path(tmp) / "out"
+                src.write_text("".join(old_lines), encoding="utf-8")
+                proc = subprocess.run(
+                    ["patch", "--batch", "--silent", "-o", str(out), str(src)],
+                    input=diff_text, capture_output=True, text=True, timeout=30,
+                )
+                if proc.returncode != 0 or not out.exists():
+                    return None
+                return out.read_text(encoding="utf-8").splitlines(keepends=True)
+        except (OSError, subprocess.SubprocessError):
             return None
+
+    def _rebuild(self, old_lines: list[str], diff_text: str) -> list[str] | None:
+        # last resort: rebuild the file from the diff body, ignoring hunk positions.
+        # Single pass; text before the first @@ only counts when there is no hunk header at all.
+        lines = diff_text.split("\n")
+        last = len(lines) - 1
+        new: list[str] = []
+        append = new.append
+        in_hunk = False
+        for i, l in enumerate(lines):
+            eol = "" if i == last else "\n"
+            if not l:
+                if eol:
+                    append(eol)
+                continue
+            c = l[0]
+            if c == "@" and l.startswith("@@"):
+                if not in_hunk:
+                    new.clear()
+                    in_hunk = True
+            elif c == "+":
+                if not l.startswith("+++"):
+                    append(l[1:] + eol)
+            elif c == "-":
+                continue  # removed line or --- header
+            elif c == " ":
+                append(l[1:] + eol)
+            elif c != "\\" or not l.startswith("\\ No newline"):
+                append(l + eol)
+        return new if new or in_hunk else None
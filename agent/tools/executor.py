@@ -12,27 +12,36 @@ class Executor:
         self.fs = FileSystemTool(cfg)
         self.term = TerminalTool(cfg)
         # Initialize LLM with DeepSeek configuration
-        llm = LLM(
+        self.llm = LLM(
             api_key=cfg.deepseek_api_key,
-            base_url=cfg.deepseek_base_url
+            base_url=cfg.deepseek_base_url,
+            cache_dir=cfg.llm_cache_dir,
+            model=cfg.deepseek_model,
+            fast_model=cfg.deepseek_model_fast
         )
-        self.edit = EditTool(cfg, llm)
+        self.edit = EditTool(cfg, self.llm)
+        # built once; dispatch is a dict lookup plus a bound-method call
+        self._table = {
+            "fs.tree": self.fs.tree,
+            "fs.read": self.fs.read,
+            "fs.write": self.fs.write,
+            "fs.create_dir": self.fs.create_dir,
+            "fs.delete": self.fs.delete,
+            "fs.move": self.fs.move,
+            "term.open": self.term.open,
+            "term.exec": self.term.exec,
+            "term.read": self.term.read,
+            "term.wait": self.term.wait,
+            "edit.apply": self.edit.apply_unified_diff,
+            "edit.suggest": self.edit.suggest_and_apply,
+            "edit.suggest_many": self.edit.suggest_and_apply_many,
+        }
+
+    def close(self) -> None:
+        self.llm.close()
 
     def dispatch(self, kind: str, args: dict) -> Any:
-        k = kind
-        m = {
-            "fs.tree": lambda: self.fs.tree(**args),
-            "fs.read": lambda: self.fs.read(**args),
-            "fs.write": lambda: self.fs.write(**args),
-            "fs.create_dir": lambda: self.fs.create_dir(**args),
-            "fs.delete": lambda: self.fs.delete(**args),
-            "fs.move": lambda: self.fs.move(**args),
-            "term.open": lambda: self.term.open(**args),
-            "term.exec": lambda: self.term.exec(**args),
-            "term.read": lambda: self.term.read(**args),
-            "edit.apply": lambda: self.edit.apply_unified_diff(**args),
-            "edit.suggest": lambda: self.edit.suggest_and_apply(**args),
-        }.get(k)
-        if not m:
-            raise ValueError(f"unknown action: {k}")
-        return m()
+        fn = self._table.get(kind)
+        if fn is None:
+            raise ValueError(f"unknown action: {kind}")
+        return fn(**args)
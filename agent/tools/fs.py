@@ -1,55 +1,75 @@
 from __future__ import annotations
 from pathlib import Path
-from typing import Literal, Optional
-import os, shutil, json
+from typing import Iterator, Literal, Optional
+import os, shutil, json, mmap
 
 from ..config import AgentConfig
-from ..utils import jail_path, match_any, atomic_write, backup_file
+from ..utils import jail_path, match_any, atomic_write, backup_file, WRITEV_MIN_BYTES, WRITE_CHUNK
+
+# below this many bytes a plain read() is cheaper than setting up a mapping
+MMAP_MIN_BYTES = 64 * 1024
 
 class FileSystemTool:
     def __init__(self, cfg: AgentConfig):
         self.cfg = cfg
 
     def tree(self, rel: str = ".", max_depth: int = 6) -> list[dict]:
-        root = self.cfg.project_root
-        base = jail_path(root, rel)
+        root = str(self.cfg.project_root)
+        base = jail_path(self.cfg.project_root, rel)
         out = []
-        for dirpath, dirnames, filenames in os.walk(base):
-            depth = Path(dirpath).relative_to(base).parts
-            if len(depth) > max_depth:
-                dirnames[:] = []
+        for path, is_dir in self._walk(str(base), 0, max_depth):
+            if not self._allowed(path): 
                 continue
-            for d in dirnames:
-                p = Path(dirpath) / d
-                if not self._allowed(p): 
-                    continue
-                out.append({"path": str(p.relative_to(root)), "type": "dir"})
-            for f in filenames:
-                p = Path(dirpath) / f
-                if not self._allowed(p): 
-                    continue
-                out.append({"path": str(p.relative_to(root)), "type": "file"})
+            out.append({"path": os.path.relpath(path, root), "type": "dir" if is_dir else "file"})
         return sorted(out, key=lambda x: (x["type"], x["path"]))
 
+    def _walk(self, base: str, depth: int, max_depth: int) -> Iterator[tuple[str, bool]]:
+        # DirEntry carries the type from the directory read itself, so no per-entry stat or Path
+        try:
+            it = os.scandir(base)
+        except OSError:
+            return
+        with it:
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                yield entry.path, is_dir
+                # like os.walk: don't follow symlinked dirs, stop at max_depth, skip denied trees
+                if is_dir and depth < max_depth and not entry.is_symlink() and not self._denied_tree(entry.path):
+                    yield from self._walk(entry.path, depth + 1, max_depth)
+
     def read(self, rel: str, start: int = 0, length: Optional[int] = None) -> dict:
         path = self._check_file(rel)
+        n = self.cfg.max_read_bytes if length is None else min(length, self.cfg.max_read_bytes)
         with open(path, "rb") as f:
-            f.seek(start)
-            data = f.read(self.cfg.max_read_bytes if length is None else min(length, self.cfg.max_read_bytes))
+            size = os.fstat(f.fileno()).st_size
+            if size - start < MMAP_MIN_BYTES:
+                f.seek(start)
+                return self._decode(f.read(n))
+            # large reads: decode straight from the mapping, skipping the intermediate bytes copy
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                with view[start:start + n] as data:
+                    return self._decode(data)
+
+    @staticmethod
+    def _decode(data: bytes | memoryview) -> dict:
         try:
-            text = data.decode("utf-8")
-            mode = "text"
-            content = text
+            return {"mode": "text", "content": str(data, "utf-8")}
         except UnicodeDecodeError:
-            mode = "bytes"
-            content = data.hex()
-        return {"mode": mode, "content": content}
+            return {"mode": "bytes", "content": data.hex()}
 
     def write(self, rel: str, content: str, backup: bool = True) -> dict:
         path = self._target(rel)
         if backup and path.exists():
             backup_file(self.cfg.backup_dir, path)
-        atomic_write(path, content.encode("utf-8"))
+        if len(content) > WRITEV_MIN_BYTES:
+            # encode piecewise instead of building one large bytes copy
+            data = [content[i:i + WRITE_CHUNK].encode("utf-8") for i in range(0, len(content), WRITE_CHUNK)]
+        else:
+            data = content.encode("utf-8")
+        atomic_write(path, data)
         return {"ok": True, "path": rel}
 
     def create_dir(self, rel: str) -> dict:
@@ -72,13 +92,17 @@ class FileSystemTool:
         shutil.move(str(s), str(d))
         return {"ok": True}
 
-    def _allowed(self, p: Path) -> bool:
-        if not match_any(p, self.cfg.allow_patterns): 
+    def _allowed(self, p: str | Path) -> bool:
+        if not match_any(p, self.cfg.allow_re): 
             return False
-        if match_any(p, self.cfg.deny_patterns): 
+        if match_any(p, self.cfg.deny_re): 
             return False
         return True
 
+    def _denied_tree(self, p: str | Path) -> bool:
+        # "<dir>/" matches deny globs such as "**/node_modules/**" iff everything below it is denied
+        return match_any(f"{p}{os.sep}", self.cfg.deny_re)
+
     def _target(self, rel: str) -> Path:
         root = self.cfg.project_root
         p = jail_path(root, rel)
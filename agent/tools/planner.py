@@ -4,7 +4,7 @@ from typing import Literal, Any
 
 @dataclass
 class Step:
-    kind: Literal["fs.tree","fs.read","fs.write","fs.create_dir","fs.delete","fs.move","term.open","term.exec","term.read","edit.apply","edit.suggest"]
+    kind: Literal["fs.tree","fs.read","fs.write","fs.create_dir","fs.delete","fs.move","term.open","term.exec","term.read","term.wait","edit.apply","edit.suggest","edit.suggest_many"]
     args: dict
 
 class Planner:
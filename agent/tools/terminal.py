@@ -1,9 +1,11 @@
 from __future__ import annotations
-import subprocess, threading, queue, os, shlex
+import subprocess, threading, os, shlex, selectors, time
 from pathlib import Path
 from typing import Dict
 from ..config import AgentConfig
 
+READ_CHUNK = 65536
+
 class ShellSession:
     def __init__(self, cfg: AgentConfig, session_id: str):
         self.cfg = cfg
@@ -14,29 +16,113 @@ class ShellSession:
             stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,
-            text=True,
-            bufsize=1,
-            universal_newlines=True
         )
-        self.q = queue.Queue()
-        self._t = threading.Thread(target=self._pump, daemon=True)
-        self._t.start()
+        self._buf = bytearray()
+        self._eof = False
+        self._lock = threading.Lock()
+        # signalled by _pump (Windows) whenever new output lands in _buf
+        self._more = threading.Condition(self._lock)
+        # echoed after a command so wait_for() can tell when it finished; _pending counts echoes in flight
+        self._marker = f"__agent_done_{os.urandom(8).hex()}__".encode()
+        self._pending = 0
+        self._fd = self.proc.stdout.fileno()
+        if os.name == "nt":
+            # anonymous pipes on Windows can't be selected on or made non-blocking
+            self._t = threading.Thread(target=self._pump, daemon=True)
+            self._t.start()
+        else:
+            # output is pulled on demand in read(); no reader thread, no queue
+            os.set_blocking(self._fd, False)
+            self._sel = selectors.DefaultSelector()
+            self._sel.register(self._fd, selectors.EVENT_READ)
 
     def _pump(self):
-        for line in self.proc.stdout:
-            self.q.put(line)
+        for chunk in iter(lambda: self.proc.stdout.read1(READ_CHUNK), b""):
+            with self._more:
+                self._buf += chunk
+                self._more.notify_all()
+        with self._more:
+            self._eof = True
+            self._more.notify_all()
+
+    def _fill(self) -> None:
+        # drain whatever the shell has written so far (POSIX only; Windows is fed by _pump)
+        if self._eof or os.name == "nt" or not self._sel.select(0):
+            return
+        while True:
+            try:
+                chunk = os.read(self._fd, READ_CHUNK)
+            except BlockingIOError:
+                return
+            if not chunk:
+                self._eof = True
+                return
+            self._buf += chunk
 
     def send(self, command: str):
         if not self.proc or not self.proc.stdin:
             raise RuntimeError("session closed")
-        self.proc.stdin.write(command + "\n")
+        self.proc.stdin.write((command + "\n").encode("utf-8"))
         self.proc.stdin.flush()
 
     def read(self, max_lines: int = 400) -> str:
-        lines = []
-        while not self.q.empty() and len(lines) < max_lines:
-            lines.append(self.q.get_nowait())
-        return "".join(lines)
+        with self._lock:
+            self._fill()
+            buf = self._buf
+            end = 0
+            for _ in range(max_lines):
+                i = buf.find(b"\n", end)
+                if i < 0:
+                    if self._eof:
+                        end = len(buf)  # shell is gone: flush the trailing partial line
+                    break
+                end = i + 1
+            return self._take(end)
+
+    def mark(self) -> None:
+        """Queue an echo of the session's completion marker behind whatever was sent before."""
+        self.send(f"echo {self._marker.decode()}")
+        with self._lock:
+            self._pending += 1
+
+    def _take(self, end: int) -> str:
+        # caller holds the lock; marker lines are bookkeeping, never shown as output
+        data = bytes(self._buf[:end])
+        del self._buf[:end]
+        if self._marker in data:
+            lines = data.splitlines(keepends=True)
+            kept = [ln for ln in lines if self._marker not in ln]
+            self._pending = max(0, self._pending - (len(lines) - len(kept)))
+            data = b"".join(kept)
+        return data.decode("utf-8", errors="replace")
+
+    def wait_for(self, timeout: float) -> tuple[str, bool]:
+        """
+        Block until every queued marker has come back or timeout elapses.
+        Returns the output before the last marker and whether it was seen;
+        on timeout, the complete lines received so far.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                self._fill()
+                i = -1
+                for _ in range(self._pending):
+                    i = self._buf.find(self._marker, i + 1)
+                    if i < 0:
+                        break
+                if i >= 0:
+                    nl = self._buf.find(b"\n", i)
+                    return self._take(len(self._buf) if nl < 0 else nl + 1), True
+                remaining = deadline - time.monotonic()
+                if self._eof or remaining <= 0:
+                    break
+                if os.name == "nt":
+                    self._more.wait(remaining)
+                    continue
+            # block in the kernel until the shell writes something (lock released meanwhile)
+            self._sel.select(remaining)
+        return self.read(), False
 
     def close(self):
         if self.proc and self.proc.poll() is None:
@@ -45,6 +131,8 @@ class ShellSession:
             except Exception:
                 pass
             self.proc.terminate()
+        if os.name != "nt":
+            self._sel.close()
 
 class TerminalTool:
     def __init__(self, cfg: AgentConfig):
@@ -73,6 +161,18 @@ class TerminalTool:
             return {"output": ""}
         return {"output": s.read()}
 
+    def wait(self, session_id: str, timeout: float = 30.0) -> dict:
+        """
+        Wait for everything sent to the session so far to finish, by echoing a marker behind it.
+        done is False if the marker didn't show up within timeout (output is then what arrived so far).
+        """
+        s = self.sessions.get(session_id)
+        if not s:
+            return {"output": "", "done": True}
+        s.mark()
+        output, done = s.wait_for(timeout)
+        return {"output": output, "done": done}
+
     def close(self, session_id: str) -> dict:
         s = self.sessions.pop(session_id, None)
         if s:
@@ -1,29 +1,125 @@
 from __future__ import annotations
 from pathlib import Path
 from typing import Iterable
-import fnmatch, os, shutil, time, hashlib
+import errno, fnmatch, os, re, shutil, stat, tempfile, time, hashlib
+
+# process umask, read once at import (os.umask can only be queried by setting it)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+# payloads above this are written as WRITE_CHUNK-sized pieces in one writev() call
+WRITEV_MIN_BYTES = 256 * 1024
+WRITE_CHUNK = 64 * 1024
+# writev() takes at most this many buffers per call on Linux
+_IOV_MAX = 1024
 
 def jail_path(root: Path, p: str | Path) -> Path:
+    # root must already be resolved; resolving p first keeps symlinks from escaping
     pp = (root / p).resolve()
-    if not str(pp).startswith(str(root)):
+    if not pp.is_relative_to(root):
         raise PermissionError(f"path escapes jail: {p}")
     return pp
 
-def match_any(path: Path, patterns: Iterable[str]) -> bool:
-    s = str(path)
-    return any(fnmatch.fnmatch(s, pat) for pat in patterns)
+def compile_patterns(patterns: Iterable[str]) -> re.Pattern:
+    # one alternation for all globs: a single regex match per path instead of one per pattern
+    parts = [f"(?:{fnmatch.translate(pat)})" for pat in patterns]
+    return re.compile("|".join(parts) if parts else "(?!)")
+
+def match_any(path: str | Path, patterns: re.Pattern | Iterable[str]) -> bool:
+    if not isinstance(patterns, re.Pattern):
+        patterns = compile_patterns(patterns)
+    return patterns.match(str(path)) is not None
 
-def atomic_write(path: Path, data: bytes) -> None:
+def _write_all(fd: int, data: bytes | memoryview | list[bytes]) -> None:
+    if isinstance(data, list):
+        chunks = [memoryview(c) for c in data]
+    else:
+        view = memoryview(data)
+        if view.nbytes <= WRITEV_MIN_BYTES or not hasattr(os, "writev"):
+            while view:
+                view = view[os.write(fd, view):]
+            return
+        chunks = [view[i:i + WRITE_CHUNK] for i in range(0, view.nbytes, WRITE_CHUNK)]
+    if not hasattr(os, "writev"):
+        for c in chunks:
+            while c:
+                c = c[os.write(fd, c):]
+        return
+    chunks = [c for c in chunks if c.nbytes]
+    while chunks:
+        n = os.writev(fd, chunks[:_IOV_MAX])
+        # drop fully written buffers, trim a partially written one
+        while chunks and n >= chunks[0].nbytes:
+            n -= chunks.pop(0).nbytes
+        if n:
+            chunks[0] = chunks[0][n:]
+
+def atomic_write(path: Path, data: bytes | memoryview | list[bytes]) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    tmp = path.with_suffix(path.suffix + ".tmp")
-    with open(tmp, "wb") as f:
-        f.write(data)
-    os.replace(tmp, path)
+    # unique temp name so concurrent writers of the same file can't clobber each other
+    fd, tmp = tempfile.mkstemp(prefix=path.name + ".", suffix=".tmp", dir=path.parent)
+    try:
+        if os.name != "nt":
+            # mkstemp creates 0600; keep the target's mode (or the umask default for new files)
+            try:
+                mode = stat.S_IMODE(os.stat(path).st_mode)
+            except FileNotFoundError:
+                mode = 0o666 & ~_UMASK
+            os.fchmod(fd, mode)
+        try:
+            size = sum(len(c) for c in data) if isinstance(data, list) else memoryview(data).nbytes
+            if size and hasattr(os, "posix_fallocate"):
+                # reserve the blocks up front: one contiguous extent, and ENOSPC before any writing
+                try:
+                    os.posix_fallocate(fd, 0, size)
+                except OSError as e:
+                    if e.errno not in (errno.EOPNOTSUPP, errno.EINVAL):
+                        raise
+            _write_all(fd, data)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    if os.name != "nt":
+        # persist the rename itself
+        dfd = os.open(path.parent, os.O_DIRECTORY)
+        try:
+            os.fsync(dfd)
+        finally:
+            os.close(dfd)
 
 def backup_file(backup_dir: Path, path: Path) -> Path:
     ts = time.strftime("%Y%m%d-%H%M%S")
     digest = hashlib.sha256(str(path).encode()).hexdigest()[:8]
     target = backup_dir / f"{path.name}.{ts}.{digest}.bak"
     target.parent.mkdir(parents=True, exist_ok=True)
-    shutil.copy2(path, target)
+    try:
+        # agent writes replace the inode (atomic_write -> os.replace), never modify it in place,
+        # so a hardlink is a zero-byte snapshot of the current content
+        os.link(path, target)
+    except OSError:
+        _copy_file(path, target)  # EXDEV (other filesystem), EPERM, no hardlink support
     return target
+
+def _copy_file(src: Path, dst: Path) -> None:
+    # copy_file_range keeps the copy in the kernel and reflinks on btrfs/XFS
+    if hasattr(os, "copy_file_range"):
+        try:
+            with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+                remaining = os.fstat(fsrc.fileno()).st_size
+                while remaining > 0:
+                    n = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                    if n == 0:
+                        break
+                    remaining -= n
+            shutil.copystat(src, dst)
+            return
+        except OSError:
+            pass
+    shutil.copy2(src, dst)
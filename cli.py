@@ -4,34 +4,109 @@ VSCode AI Agent CLI
 A command-line interface for the VSCode AI Agent with DeepSeek integration.
 """
 
-import argparse
 import os
 import sys
-from pathlib import Path
-from typing import Optional
+
+__version__ = "0.1.0"
+
+# pre-rendered `--help` so the common no-op invocations skip argparse and the agent imports;
+# keep in sync with create_parser()
+_STATIC_HELP = """\
+usage: {prog} [-h] [--version] [--project-root PROJECT_ROOT]
+              {{edit,list,run,plan,mkdir,touch,rm,review,interactive}} ...
+
+VSCode AI Agent CLI - AI-powered development assistant
+
+positional arguments:
+  {{edit,list,run,plan,mkdir,touch,rm,review,interactive}}
+                        Available commands
+    edit                Edit a file with AI assistance
+    list                List files in a directory
+    run                 Execute a terminal command
+    plan                Create a plan for a task
+    mkdir               Create a new folder
+    touch               Create a new file
+    rm                  Delete a file or folder
+    review              Review code for errors and quality
+    interactive         Start interactive mode
+
+options:
+  -h, --help            show this help message and exit
+  --version, -v         show program's version number and exit
+  --project-root PROJECT_ROOT, -p PROJECT_ROOT
+                        Project root directory (default: current directory)
+
+Examples:
+  {prog} edit main.py "add error handling to the main function"
+  {prog} list src/
+  {prog} run "npm test"
+  {prog} plan "implement user authentication"
+  {prog} interactive
+
+For more information, visit: https://github.com/your-repo/vscode-ai-agent
+"""
+
+def _fast_path(argv: list) -> None:
+    """Handle bare/help/version invocations before anything heavy is imported."""
+    if len(argv) > 1 and argv[1] not in ("-h", "--help", "-v", "--version"):
+        return
+    prog = os.path.basename(argv[0]) if argv else "cli.py"
+    if len(argv) > 1 and argv[1] in ("-v", "--version"):
+        sys.stdout.write(f"{prog} {__version__}\n")
+    else:
+        sys.stdout.write(_STATIC_HELP.format(prog=prog))
+    sys.exit(0)
+
+if __name__ == "__main__":
+    # before the imports below, so help/version pay only for os and sys
+    _fast_path(sys.argv)
+
+import ast
+import io
 import json
+import re
+import shlex
+import shutil
+import stat
+import subprocess
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+from functools import lru_cache
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
 
-# Load environment variables from .env file
-try:
-    from dotenv import load_dotenv
-    load_dotenv()
-except ImportError:
-    pass  # python-dotenv not installed, skip loading
+if TYPE_CHECKING:
+    import argparse  # imported for real inside create_parser
+
+def _maybe_load_dotenv() -> None:
+    """Load environment variables from .env file (only once a real command runs)"""
+    if os.environ.get("AGENT_LOAD_DOTENV", "1") != "1":
+        return
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass  # python-dotenv not installed, skip loading
+
+@lru_cache(maxsize=1)
+def _api_key() -> Optional[str]:
+    """DEEPSEEK_API_KEY, read once (after _maybe_load_dotenv has run)"""
+    return os.getenv('DEEPSEEK_API_KEY')
+
+@lru_cache(maxsize=1)
+def _shell_path() -> str:
+    """Shell for TerminalTool; on Windows, the PATH lookup for PowerShell happens once"""
+    if os.name != "nt":
+        return "bash"
+    return shutil.which("pwsh") or shutil.which("powershell") or "powershell.exe"
 
 # Add the current directory to Python path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 
-from agent.config import AgentConfig
-from agent.llm import LLM, EditInstruction
-from agent.tools.executor import Executor
-from agent.tools.fs import FileSystemTool
-from agent.tools.edit import EditTool
-from agent.tools.terminal import TerminalTool
-from agent.tools.planner import Planner
+# agent.* is imported inside VSCodeAICLI so --help and argparse errors don't load the LLM/tool stack
 
 try:
-    from colorama import init, Fore, Back, Style
-    init()  # Initialize colorama for Windows
+    from colorama import Fore, Back, Style
     COLORS_AVAILABLE = True
 except ImportError:
     COLORS_AVAILABLE = False
@@ -43,62 +118,564 @@ except ImportError:
     class Style:
         BRIGHT = DIM = NORMAL = RESET_ALL = ""
 
+_colors_inited = False
+
+def _init_colors() -> None:
+    """Initialize colorama for Windows (console probe deferred past the help fast path)"""
+    global _colors_inited
+    if COLORS_AVAILABLE and not _colors_inited:
+        from colorama import init
+        init()
+        _colors_inited = True
+
 class CLIColors:
     """Color utilities for CLI output"""
+    # Prefixes are bound as default args (fast local lookups, no per-call branch); without
+    # colorama they're all "". The explicit reset stays because colored tokens are often
+    # embedded mid-line, where autoreset would leave the rest of the line colored.
     
     @staticmethod
-    def success(text: str) -> str:
-        return f"{Fore.GREEN}{text}{Style.RESET_ALL}" if COLORS_AVAILABLE else text
+    def success(text: str, _p: str = Fore.GREEN, _r: str = Style.RESET_ALL) -> str:
+        return _p + text + _r
     
     @staticmethod
-    def error(text: str) -> str:
-        return f"{Fore.RED}{text}{Style.RESET_ALL}" if COLORS_AVAILABLE else text
+    def error(text: str, _p: str = Fore.RED, _r: str = Style.RESET_ALL) -> str:
+        return _p + text + _r
     
     @staticmethod
-    def warning(text: str) -> str:
-        return f"{Fore.YELLOW}{text}{Style.RESET_ALL}" if COLORS_AVAILABLE else text
+    def warning(text: str, _p: str = Fore.YELLOW, _r: str = Style.RESET_ALL) -> str:
+        return _p + text + _r
     
     @staticmethod
-    def info(text: str) -> str:
-        return f"{Fore.CYAN}{text}{Style.RESET_ALL}" if COLORS_AVAILABLE else text
+    def info(text: str, _p: str = Fore.CYAN, _r: str = Style.RESET_ALL) -> str:
+        return _p + text + _r
     
     @staticmethod
-    def highlight(text: str) -> str:
-        return f"{Fore.MAGENTA}{Style.BRIGHT}{text}{Style.RESET_ALL}" if COLORS_AVAILABLE else text
+    def highlight(text: str, _p: str = Fore.MAGENTA + Style.BRIGHT, _r: str = Style.RESET_ALL) -> str:
+        return _p + text + _r
+
+# Piped or redirected output gets no escape codes at all: the helpers become identity
+# functions, and the colored constants below are built after this so they stay plain too.
+if sys.stdout is None or not sys.stdout.isatty():
+    CLIColors.success = CLIColors.error = CLIColors.warning = CLIColors.info = \
+        CLIColors.highlight = staticmethod(lambda text: text)
+
+# Static messages are colored once at import instead of on every help/diagnostic print
+_ASCII_ART = """
+ ██╗   ██╗███████╗ ██████╗ ██████╗ ██████╗ ███████╗ 
+ ██║   ██║██╔════╝██╔════╝██╔═══██╗██╔══██╗██╔════╝ 
+ ██║   ██║█████╗  ██║     ██║   ██║██║  ██║█████╗  
+ ╚██╗ ██╔╝██╔══╝  ██║     ██║   ██║██║  ██║██╔══╝  
+  ╚████╔╝ ███████╗╚██████╗╚██████╔╝██████╔╝███████╗ 
+   ╚═══╝  ╚══════╝ ╚═════╝ ╚═════╝ ╚═════╝ ╚══════╝
+"""
+
+_HELP_TEXT = """
+🔧 Available Commands:
+
+  edit <filepath> <instruction>  - Edit a file with AI assistance
+  fix <filepath>                 - Fix errors or issues in a file
+  ls [directory]                 - List files in directory (default: current)
+  list [directory]               - Alias for 'ls'
+  run <command>                  - Execute a terminal command
+  plan <task_description>        - Create a plan for a task
+  mkdir <folder_name>            - Create a new folder
+  touch <file_name>              - Create a new file
+  rm <file_or_folder>            - Delete a file or folder
+  review <filepath> [--fix]      - Review code for errors and quality (use --fix to auto-fix issues)
+  help                          - Show this help message
+  exit                          - Exit interactive mode
+
+🤖 AI-Powered Natural Language:
+  You can also use natural language! Try commands like:
+  "make new folder called test"
+  "create a file named readme.txt"
+  "delete the old logs folder"
+  "show me what's in the src directory"
+  "review the supermarket checkout code"
+  "check for errors in my Python file"
+
+📝 Examples:
+  edit main.py "add error handling"
+  ls src/
+  run "npm install"
+  plan "create a REST API for user management"
+  mkdir "my new project"
+  touch config.json
+  review app.py
+"""
+
+# each burst below goes out in a single write; {root} is filled in when interactive mode starts
+_STARTUP_BANNER = '\n'.join([
+    CLIColors.highlight(_ASCII_ART),
+    '',
+    CLIColors.highlight("🚀 VSCode AI Agent - Interactive Mode"),
+    CLIColors.info("📁 Project Root: {root}"),
+    CLIColors.info("💡 Type 'help' for available commands, 'exit' to quit."),
+    CLIColors.info("🤖 AI-powered: I can understand natural language commands!"),
+    '', '',
+])
+_HELP_OUTPUT = CLIColors.info(_HELP_TEXT) + '\n'
+_PROMPT_COLORED = CLIColors.highlight("ai-agent> ")
+_GOODBYE_COLORED = CLIColors.success("👋 Goodbye!")
+_AUTOFIX_UNAVAILABLE = CLIColors.warning("⚠️  Auto-fix not available for this type of syntax error")
+_AUTOFIX_HINT = CLIColors.warning("💡 To automatically fix this error, use: review --fix <filename>")
+
+# (name, `python -m` args, timeout) for the linters _review_python_file runs side by side
+# flake8 reads the source from stdin (`-`); the others need the real path (bandit would report "<stdin>").
+# pylint skips what _quick_lint already reports from the parsed tree.
+LINTERS = (
+    ("flake8", ("flake8", "--max-line-length=88", "--stdin-display-name"), 30),
+    ("pylint", ("pylint", "--score=no", "--reports=no", "--disable=unused-import,bare-except"), 45),
+    ("bandit", ("bandit", "-f", "txt"), 30),
+    ("mypy", ("mypy", "--ignore-missing-imports"), 30),
+)
+STDIN_LINTERS = frozenset({"flake8"})
+
+def _run_tool(argv: list, timeout: float, input: Optional[bytes] = None):
+    """Run a linter (stdin closed unless input is given); stdout is read as bytes and decoded once (stderr is unused)"""
+    stdin = subprocess.DEVNULL if input is None else None
+    result = subprocess.run(argv, stdin=stdin, input=input, stdout=subprocess.PIPE,
+                            stderr=subprocess.DEVNULL, timeout=timeout, shell=False)
+    result.stdout = result.stdout.decode('utf-8', 'replace')
+    return result
+
+def _quote_info(syntax_error: SyntaxError, content: str) -> tuple:
+    """
+    ((single, double) quote counts on the error line, unclosed triple quote as returned by
+    _unclosed_triple_quote), each only computed when the error message calls for it, else
+    None. Built once per error and passed to both the explanation and the auto-fix.
+    """
+    msg = syntax_error.msg.lower()
+    if 'unterminated string literal' in msg or 'eol while scanning string literal' in msg:
+        span = _line_span(content, syntax_error.lineno - 1 if syntax_error.lineno else 0)
+        if span is None:
+            return None, None
+        line = content[span[0]:span[1]]
+        return (line.count("'"), line.count('"')), None
+    if 'triple-quoted string literal' in msg:
+        return None, _unclosed_triple_quote(content)
+    return None, None
+
+def _unclosed_triple_quote(content: str) -> Optional[tuple]:
+    """
+    (line index, quote) of the triple-quoted string left open at EOF, or None. One forward
+    pass with str.find: outside a string the nearer triple quote of either kind opens one,
+    inside it only the same kind closes it (so the other kind nested inside doesn't count).
+    """
+    pos = 0
+    quote = None
+    start = -1
+    while True:
+        if quote is None:
+            dq = content.find('"""', pos)
+            sq = content.find("'''", pos)
+            if dq < 0 and sq < 0:
+                return None
+            if sq < 0 or 0 <= dq < sq:
+                quote, start = '"""', dq
+            else:
+                quote, start = "'''", sq
+            pos = start + 3
+        else:
+            end = content.find(quote, pos)
+            if end < 0:
+                return content.count('\n', 0, start), quote
+            quote = None
+            pos = end + 3
+
+def _line_span(content: str, lineno0: int) -> Optional[tuple]:
+    """(start, end) offsets of line lineno0 (numbered as in content.split('\n')), or None past the end"""
+    start = 0
+    for _ in range(lineno0):
+        nl = content.find('\n', start)
+        if nl < 0:
+            return None
+        start = nl + 1
+    end = content.find('\n', start)
+    return start, len(content) if end < 0 else end
+
+def _replace_line(content: str, span: tuple, new_line: str) -> str:
+    """content with the line at span (from _line_span) replaced; no split/join of the whole file"""
+    return content[:span[0]] + new_line + content[span[1]:]
+
+def _write_text(path: Path, text: str) -> None:
+    """Replace path's contents with text, encoded once and written straight to the fd (no text-layer buffering)"""
+    data = memoryview(text.encode('utf-8'))
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+    try:
+        while data:
+            data = data[os.write(fd, data):]
+    finally:
+        os.close(fd)
+
+def _commit_fix(path: Path, fixed: Optional[str]) -> Optional[str]:
+    """Write an auto-fix result (when there is one) and pass it through"""
+    if fixed is not None:
+        _write_text(path, fixed)
+    return fixed
+
+def _extract_json_object(text: str) -> Optional[str]:
+    """
+    The first balanced {...} in text, or None. One forward pass that tracks string
+    literals and escapes, so nested objects and braces inside strings are handled.
+    """
+    start = text.find('{')
+    if start < 0:
+        return None
+    depth = 0
+    in_string = escaped = False
+    for i in range(start, len(text)):
+        c = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif c == '\\':
+                escaped = True
+            elif c == '"':
+                in_string = False
+        elif c == '"':
+            in_string = True
+        elif c == '{':
+            depth += 1
+        elif c == '}':
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return None
+
+def _write_lines(parts: list) -> None:
+    """Emit a block of output lines with one write instead of a print() per line"""
+    if parts:
+        sys.stdout.write('\n'.join(parts) + '\n')
+
+def _quick_lint(tree: ast.AST) -> list:
+    """In-process checks on an already-parsed module: unused imports and bare excepts"""
+    imported = {}
+    used = set()
+    issues = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                imported.setdefault(alias.asname or alias.name.split('.')[0], node.lineno)
+        elif isinstance(node, ast.ImportFrom):
+            if node.module == '__future__':
+                continue
+            for alias in node.names:
+                if alias.name != '*':
+                    imported.setdefault(alias.asname or alias.name, node.lineno)
+        elif isinstance(node, ast.Name):
+            used.add(node.id)
+        elif isinstance(node, ast.Constant) and isinstance(node.value, str):
+            used.add(node.value)  # names re-exported through __all__ or used in string annotations
+        elif isinstance(node, ast.ExceptHandler) and node.type is None:
+            issues.append((node.lineno, "bare 'except:' also catches KeyboardInterrupt/SystemExit"))
+    for name, lineno in imported.items():
+        if name not in used:
+            issues.append((lineno, f"'{name}' imported but unused"))
+    return [f"Line {lineno}: {msg}" for lineno, msg in sorted(issues)]
+
+# a reply wrapped in a ``` fence: the body, minus the opening line and a closing ``` line if present
+_FENCE_RE = re.compile(r'\A```[^\n]*\n(.*?)(?:\n[^\S\n]*```[^\S\n]*)?\Z', re.DOTALL)
+
+# list_files entry icons by tree() type; anything else is shown as a file
+_ICONS = {'dir': '📁', 'file': '📄'}
+
+# substrings that mark a line as a block statement (which needs a trailing colon); one regex
+# alternation scans the line once instead of nine separate `in` checks
+_CONTROL_KW_RE = re.compile('|'.join(re.escape(kw) for kw in
+                                     ('if ', 'for ', 'while ', 'def ', 'class ', 'try:', 'except', 'else', 'elif')))
+
+# words at least one of which any command the NL interpreter can map will contain (stems, so
+# "creating"/"deleted" match); input with none of them skips the LLM round-trip
+_NL_VERB_RE = re.compile(r'\b(?:make|creat|new|delet|remov|show|list|fix|review|check|run|'
+                         r'open|add|edit|plan|writ|generat|build|access)', re.IGNORECASE)
+
+# seconds run_command waits for a command to finish before showing partial output
+RUN_TIMEOUT = 30.0
+
+# larger files are not sent for AI review (the API would reject or truncate them, at real cost)
+MAX_REVIEW_BYTES = 256 * 1024
+_REVIEW_TOO_LARGE = CLIColors.warning(
+    f"🤖 File too large for AI review (over {MAX_REVIEW_BYTES // 1024} KiB); use targeted review on sections")
+
+# content-generation prompts for create_file_with_content, keyed by (content_type, extension);
+# an extension of None matches any file. Formatted with file_name and instruction.
+_CALCULATOR_PROMPT = """Generate the actual Python calculator code that should be written inside '{file_name}'. 
+                
+Requirements:
+- Include basic arithmetic operations (add, subtract, multiply, divide)
+- Handle user input and output
+- Include error handling for division by zero and invalid input
+- Make it user-friendly with clear prompts
+- Add a main function and proper if __name__ == '__main__' guard
+- Include docstrings and comments
+                
+Generate ONLY the Python code content, not code that creates files."""
+
+_WEB_SERVER_PROMPT = """Create a simple web server for the file '{file_name}'.
+                
+Requirements:
+- Use Python with Flask or built-in http.server
+- Include basic routes (home page, about)
+- Handle GET requests
+- Include proper error handling
+- Make it easy to run and test
+- Add comments explaining the code
+                
+Generate complete, functional Python code."""
+
+_API_PROMPT = """Create a REST API for the file '{file_name}'.
+                
+Requirements:
+- Use Python with Flask
+- Include CRUD operations (GET, POST, PUT, DELETE)
+- Use JSON for data exchange
+- Include proper error handling and status codes
+- Add example endpoints
+- Include documentation in comments
+                
+Generate complete, functional Python code."""
+
+_SCRIPT_PROMPT = """Create a Python script for the file '{file_name}' based on: {instruction}
+                
+Requirements:
+- Make it functional and ready to run
+- Include proper error handling
+- Add helpful comments
+- Use best practices
+- Include a main function if appropriate
+                
+Generate complete, functional Python code."""
+
+_CONFIG_JSON_PROMPT = """Create a JSON configuration file for '{file_name}' based on: {instruction}
+                    
+Requirements:
+- Use proper JSON format
+- Include common configuration options
+- Add comments where possible (if JSON5 format)
+- Make it well-structured and readable
+                    
+Generate valid JSON content."""
+
+_CONFIG_YAML_PROMPT = """Create a YAML configuration file for '{file_name}' based on: {instruction}
+                    
+Requirements:
+- Use proper YAML format
+- Include common configuration options
+- Add comments explaining each section
+- Make it well-structured and readable
+                    
+Generate valid YAML content."""
+
+_CONFIG_PROMPT = """Create a configuration file for '{file_name}' based on: {instruction}
+                    
+Requirements:
+- Use appropriate format for the file extension
+- Include common configuration options
+- Add comments explaining settings
+- Make it well-structured and readable
+                    
+Generate valid configuration content."""
+
+_README_PROMPT = """Create a README.md file for '{file_name}' based on: {instruction}
+                
+Requirements:
+- Use proper Markdown format
+- Include project title, description, installation, usage
+- Add examples if relevant
+- Include contributing guidelines
+- Make it comprehensive and helpful
+                
+Generate complete Markdown content."""
+
+_OTHER_PROMPT = """Create content for the file '{file_name}' based on: {instruction}
+                
+Requirements:
+- Make it functional and appropriate for the file type
+- Include proper formatting for the file extension
+- Add helpful comments or documentation
+- Use best practices
+- Make it ready to use
+                
+Generate complete, functional content."""
+
+_PROMPT_TEMPLATES = {
+    ("calculator", None): _CALCULATOR_PROMPT,
+    ("web_server", None): _WEB_SERVER_PROMPT,
+    ("api", None): _API_PROMPT,
+    ("script", None): _SCRIPT_PROMPT,
+    ("config", ".json"): _CONFIG_JSON_PROMPT,
+    ("config", ".yaml"): _CONFIG_YAML_PROMPT,
+    ("config", ".yml"): _CONFIG_YAML_PROMPT,
+    ("config", None): _CONFIG_PROMPT,
+    ("readme", None): _README_PROMPT,
+}
+
+# natural-language interpreter prompt; only the user's words go between prefix and suffix
+_NL_PROMPT_PREFIX = 'You are a CLI command interpreter. The user said: "'
+
+_NL_PROMPT_SUFFIX = """\"
+
+Analyze this command and determine what the user wants to do. Respond with a JSON object containing:
+{
+  "action": "create_folder" | "create_file" | "create_file_with_content" | "delete" | "edit" | "list" | "run" | "plan" | "review" | "fix" | "unknown",
+  "target": "the file/folder name or path",
+  "instruction": "additional instruction if needed (for content generation)",
+  "content_type": "calculator" | "web_server" | "api" | "script" | "config" | "readme" | "empty" | "other",
+  "confidence": 0.0-1.0
+}
+
+Examples:
+- "make new folder name like 'test example 1'" -> {"action": "create_folder", "target": "test example 1", "confidence": 0.9}
+- "create a new folder and name 'example test 1'" -> {"action": "create_folder", "target": "example test 1", "confidence": 0.9}
+- "create a new folder and name \"example tset 1\"" -> {"action": "create_folder", "target": "example tset 1", "confidence": 0.9}
+- "make a folder called test" -> {"action": "create_folder", "target": "test", "confidence": 0.9}
+- "create directory named xyz" -> {"action": "create_folder", "target": "xyz", "confidence": 0.9}
+- "create a file called readme.txt" -> {"action": "create_file", "target": "readme.txt", "confidence": 0.9}
+- "access to the test folder and create a new python file about a calculator" -> {"action": "create_file_with_content", "target": "test/calculator.py", "instruction": "create a calculator", "content_type": "calculator", "confidence": 0.9}
+- "create a calculator python file" -> {"action": "create_file_with_content", "target": "calculator.py", "instruction": "create a calculator", "content_type": "calculator", "confidence": 0.9}
+- "make a web server script" -> {"action": "create_file_with_content", "target": "server.py", "instruction": "create a web server", "content_type": "web_server", "confidence": 0.9}
+- "delete the old logs folder" -> {"action": "delete", "target": "logs", "confidence": 0.8}
+- "show me what's in the src directory" -> {"action": "list", "target": "src", "confidence": 0.9}
+- "review the supermarket checkout code" -> {"action": "review", "target": "test/supermarket_checkout.py", "confidence": 0.9}
+- "check for errors in app.py" -> {"action": "review", "target": "app.py", "confidence": 0.9}
+- "fix the supermarket checkout file" -> {"action": "fix", "target": "test/supermarket_checkout.py", "confidence": 0.9}
+- "fix errors in main.py" -> {"action": "fix", "target": "main.py", "confidence": 0.9}
+
+Pay special attention to:
+1. Folder/directory creation commands with keywords: "create", "make", "new", "folder", "directory", "dir"
+2. File creation with specific functionality: "calculator", "web server", "API", "script", etc.
+3. Extract the folder/file name from quotes or after words like "name", "called", "named"
+4. Detect when user wants functional code vs empty file
+
+Use "create_file_with_content" when the user specifies what the file should do (calculator, server, etc.)
+Use "create_file" for simple empty file creation
+
+Only respond with the JSON object, no other text."""
+
+_NL_SYSTEM_PROMPT = "You are a CLI command interpreter that responds only with valid JSON."
+
+# _ai_code_review joins these around the file so the source is copied into the prompt only once
+_REVIEW_PREFIX_FMT = """Please review this code file and provide a comprehensive analysis:
+
+File: {path}
+
+Code:
+```
+"""
+
+_REVIEW_SUFFIX = """
+```
+
+Please analyze:
+1. Code quality and best practices
+2. Potential bugs or logical errors
+3. Performance considerations
+4. Security vulnerabilities
+5. Maintainability and readability
+6. Suggestions for improvement
+
+Provide specific, actionable feedback with line references where applicable."""
+
+_REVIEW_SYSTEM_PROMPT = "You are an expert code reviewer. Provide detailed, constructive feedback on code quality, potential issues, and improvements. Be specific and reference line numbers when possible."
+
+# returned by an interactive command handler whose arguments don't fit its usage
+_BAD_ARGS = object()
+
+def _lexer(text: str) -> shlex.shlex:
+    lex = shlex.shlex(text, posix=True)
+    lex.whitespace_split = True
+    lex.commenters = ''
+    if os.name == 'nt':
+        lex.escape = ''  # backslashes are path separators there, not escapes
+    return lex
+
+def _split_args(rest: str) -> list:
+    """Tokenize an interactive command's arguments, so quoted names stay one argument"""
+    try:
+        return list(_lexer(rest))
+    except ValueError:  # unbalanced quote
+        return rest.split()
+
+def _split_first(rest: str) -> tuple:
+    """(first token, rest of the text exactly as typed); ('', '') for blank input"""
+    lex = _lexer(rest)
+    try:
+        first = lex.get_token()
+    except ValueError:  # unbalanced quote in the first token
+        parts = rest.split(maxsplit=1)
+        return (parts[0] if parts else ''), (parts[1] if len(parts) > 1 else '')
+    return first or '', rest[lex.instream.tell():].strip()
+
+def _joined(method):
+    """Adapt a one-string-argument method to the interactive dispatch's token list"""
+    return lambda args: method(' '.join(args))
+
 
 class VSCodeAICLI:
     """Main CLI class for VSCode AI Agent"""
     
     def __init__(self, project_root: Optional[str] = None):
+        _maybe_load_dotenv()
+        from agent.config import AgentConfig
+        from agent.llm import LLM, EditInstruction
+        from agent.tools.executor import Executor
+        from agent.tools.fs import FileSystemTool
+        from agent.tools.edit import EditTool
+        from agent.tools.terminal import TerminalTool
+        from agent.tools.planner import Planner
+
         self.project_root = Path(project_root or os.getcwd()).resolve()
-        # Determine shell path for Windows
-        if os.name == "nt":
-            # Try to find PowerShell executable
-            import shutil
-            shell_path = shutil.which("pwsh") or shutil.which("powershell") or "powershell.exe"
-        else:
-            shell_path = "bash"
-            
+        # read once; the key can't change during a session
+        self._api_key = _api_key()
+        self._has_api_key = bool(self._api_key)
         self.config = AgentConfig(
             project_root=self.project_root,
-            shell=shell_path
+            shell=_shell_path(),
+            deepseek_api_key=self._api_key
         ).resolve()
         
         # Initialize components
-        self.llm = LLM()
+        self.llm = LLM(api_key=self._api_key, cache_dir=self.config.llm_cache_dir,
+                       model=self.config.deepseek_model, fast_model=self.config.deepseek_model_fast)
         self.executor = Executor(self.config)
         self.fs_tool = FileSystemTool(self.config)
         self.edit_tool = EditTool(self.config, self.llm)
         self.terminal_tool = TerminalTool(self.config)
         self.planner_tool = Planner()
         
+        # interactive command -> (handler, colored usage error or None when the command takes no
+        # required argument, raw). Handlers get the argument tokens, or with raw the rest of the
+        # line as typed; they return _BAD_ARGS on unusable input
+        edit = (self._cmd_edit, CLIColors.error("❌ Usage: edit <filepath> <instruction>"), True)
+        ls = (self._cmd_ls, None, False)
+        mkdir = (_joined(self.create_folder), CLIColors.error("❌ Usage: mkdir <folder_name>"), False)
+        touch = (_joined(self.create_file), CLIColors.error("❌ Usage: touch <file_name>"), False)
+        rm = (_joined(self.delete_item), CLIColors.error("❌ Usage: rm <file_or_folder>"), False)
+        self._dispatch = {
+            'edit': edit,
+            'ls': ls, 'list': ls,
+            'run': (self._cmd_run, CLIColors.error("❌ Usage: run <command>"), True),
+            'plan': (_joined(self.plan_task), CLIColors.error("❌ Usage: plan <task_description>"), False),
+            'mkdir': mkdir, 'md': mkdir, 'create-folder': mkdir, 'create-dir': mkdir,
+            'touch': touch, 'create-file': touch, 'new-file': touch,
+            'review': (self._cmd_review, CLIColors.error("❌ Usage: review <filepath> [--fix]"), False),
+            'fix': (self._cmd_fix, CLIColors.error("❌ Usage: fix <filepath>"), False),
+            'rm': rm, 'delete': rm, 'remove': rm,
+        }
+        self._edit_instruction = EditInstruction  # bound once; edit_file builds one per call
+        
         # Check for DeepSeek API key
         self._check_api_key()
     
+    def _abs(self, name: str) -> Path:
+        """Resolve a user-supplied path against the (already resolved) project root"""
+        return Path(name) if os.path.isabs(name) else self.project_root / name
+    
     def _check_api_key(self):
         """Check if DeepSeek API key is configured"""
-        api_key = os.getenv('DEEPSEEK_API_KEY')
-        if not api_key:
+        if not self._has_api_key:
             print(CLIColors.warning(
                 "⚠️  Warning: DEEPSEEK_API_KEY not found in environment variables."
             ))
@@ -113,9 +690,7 @@ class VSCodeAICLI:
     def edit_file(self, filepath: str, instruction: str) -> bool:
         """Edit a file using AI assistance"""
         try:
-            file_path = Path(filepath)
-            if not file_path.is_absolute():
-                file_path = self.project_root / file_path
+            file_path = self._abs(filepath)
             
             if not file_path.exists():
                 print(CLIColors.error(f"❌ File not found: {file_path}"))
@@ -126,17 +701,28 @@ class VSCodeAICLI:
             print()
             
             # Read current file content
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            content = file_path.read_text(encoding='utf-8')
             
             # Generate edit instruction
-            edit_instruction = EditInstruction(goal=instruction, context=content)
-            
-            # Get AI-generated diff
-            diff = self.llm.generate_unified_diff(str(file_path), content, edit_instruction)
+            edit_instruction = self._edit_instruction(goal=instruction, context=content)
             
+            # Get AI-generated diff, echoing it as it streams in
             print(CLIColors.highlight("🤖 AI Generated Changes:"))
-            print(diff)
+            streamed = []
+            def on_token(token: str) -> None:
+                streamed.append(token)
+                sys.stdout.write(token)
+                sys.stdout.flush()
+            diff = self.llm.generate_unified_diff(str(file_path), content, edit_instruction, on_token=on_token)
+            if not streamed:
+                # fallback mode returns the diff without streaming
+                print(diff, end="")
+            elif "".join(streamed).strip() != diff:
+                # the stream broke off and the LLM fell back; show what will actually be applied
+                print()
+                print(CLIColors.warning("⚠️  Streaming failed; using this diff instead:"))
+                print(diff, end="")
+            print()
             print()
             
             # Ask for confirmation
@@ -161,16 +747,13 @@ class VSCodeAICLI:
     def list_files(self, directory: str = ".") -> bool:
         """List files in a directory"""
         try:
-            dir_path = Path(directory)
-            if not dir_path.is_absolute():
-                dir_path = self.project_root / dir_path
+            dir_path = self._abs(directory)
             
             files = self.fs_tool.tree(str(dir_path.relative_to(self.project_root)) if dir_path != self.project_root else ".")
             if files:
                 print(f"\n📁 Files in {dir_path}:")
-                for file in files:
-                    file_type = "📁" if file.get('type') == 'dir' else "📄"
-                    print(f"  {file_type} {file['path']}")
+                icon = _ICONS.get
+                _write_lines([f"  {icon(file.get('type'), '📄')} {file['path']}" for file in files])
             else:
                 print(f"\n📁 Directory {dir_path} is empty.")
             return True
@@ -194,18 +777,18 @@ class VSCodeAICLI:
             exec_result = self.terminal_tool.exec(session_id, command)
             
             if exec_result.get('ok', False):
-                # Wait a moment for command to execute
-                import time
-                time.sleep(1.5)
-                
-                # Read output
-                read_result = self.terminal_tool.read(session_id)
+                # Block until the command finishes (or RUN_TIMEOUT passes) instead of sleeping
+                read_result = self.terminal_tool.wait(session_id, timeout=RUN_TIMEOUT)
                 output = read_result.get('output', '')
                 
                 if output.strip():
                     print(CLIColors.highlight("📤 Output:"))
                     print(output)
                 
+                if not read_result.get('done', True):
+                    print(CLIColors.warning(f"⏳ Command still running after {RUN_TIMEOUT:g}s; output so far shown"))
+                    return True
+                
                 print(CLIColors.success("✅ Command executed successfully!"))
                 return True
             else:
@@ -238,15 +821,14 @@ class VSCodeAICLI:
     def create_folder(self, folder_name: str) -> bool:
         """Create a new folder"""
         try:
-            folder_path = Path(folder_name)
-            if not folder_path.is_absolute():
-                folder_path = self.project_root / folder_path
+            folder_path = self._abs(folder_name)
             
-            if folder_path.exists():
+            # mkdir itself reports an existing path: no separate exists() stat, no check/create race
+            try:
+                folder_path.mkdir(parents=True)
+            except FileExistsError:
                 print(CLIColors.warning(f"⚠️  Folder already exists: {folder_path}"))
                 return False
-            
-            folder_path.mkdir(parents=True, exist_ok=True)
             print(CLIColors.success(f"✅ Created folder: {folder_path}"))
             return True
             
@@ -257,19 +839,17 @@ class VSCodeAICLI:
     def create_file(self, file_name: str) -> bool:
         """Create a new file"""
         try:
-            file_path = Path(file_name)
-            if not file_path.is_absolute():
-                file_path = self.project_root / file_path
-            
-            if file_path.exists():
-                print(CLIColors.warning(f"⚠️  File already exists: {file_path}"))
-                return False
+            file_path = self._abs(file_name)
             
             # Create parent directories if they don't exist
             file_path.parent.mkdir(parents=True, exist_ok=True)
             
-            # Create empty file
-            file_path.touch()
+            # Create empty file; O_EXCL doubles as the existence check
+            try:
+                os.close(os.open(file_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666))
+            except FileExistsError:
+                print(CLIColors.warning(f"⚠️  File already exists: {file_path}"))
+                return False
             print(CLIColors.success(f"✅ Created file: {file_path}"))
             return True
             
@@ -280,9 +860,7 @@ class VSCodeAICLI:
     def create_file_with_content(self, file_name: str, instruction: str, content_type: str) -> bool:
         """Create a new file with AI-generated content"""
         try:
-            file_path = Path(file_name)
-            if not file_path.is_absolute():
-                file_path = self.project_root / file_path
+            file_path = self._abs(file_name)
             
             if file_path.exists():
                 print(CLIColors.warning(f"⚠️  File already exists: {file_path}"))
@@ -296,8 +874,7 @@ class VSCodeAICLI:
             
             if content:
                 # Write content to file
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(content)
+                _write_text(file_path, content)
                 print(CLIColors.success(f"✅ Created file with content: {file_path}"))
                 return True
             else:
@@ -306,132 +883,29 @@ class VSCodeAICLI:
                 print(CLIColors.warning(f"⚠️  Created empty file (content generation failed): {file_path}"))
                 return True
             
-        except Exception as e:
-            print(CLIColors.error(f"❌ Error creating file: {str(e)}"))
-            return False
-    
-    def _generate_file_content(self, file_name: str, instruction: str, content_type: str) -> str:
-        """Generate file content using AI based on instruction and content type"""
-        try:
-            # Check if DeepSeek API key is available
-            api_key = os.getenv('DEEPSEEK_API_KEY')
-            if not api_key:
-                print(CLIColors.warning("🤖 Content generation requires DEEPSEEK_API_KEY to be set."))
-                return ""
-            
-            print(CLIColors.info(f"🤖 Generating {content_type} content..."))
-            
-            # Determine file extension and language
-            file_path = Path(file_name)
-            file_ext = file_path.suffix.lower()
-            
-            # Create content generation prompt based on content type
-            if content_type == 'calculator':
-                content_prompt = f"""Generate the actual Python calculator code that should be written inside '{file_name}'. 
-                
-Requirements:
-- Include basic arithmetic operations (add, subtract, multiply, divide)
-- Handle user input and output
-- Include error handling for division by zero and invalid input
-- Make it user-friendly with clear prompts
-- Add a main function and proper if __name__ == '__main__' guard
-- Include docstrings and comments
-                
-Generate ONLY the Python code content, not code that creates files."""
-            
-            elif content_type == 'web_server':
-                content_prompt = f"""Create a simple web server for the file '{file_name}'.
-                
-Requirements:
-- Use Python with Flask or built-in http.server
-- Include basic routes (home page, about)
-- Handle GET requests
-- Include proper error handling
-- Make it easy to run and test
-- Add comments explaining the code
-                
-Generate complete, functional Python code."""
-            
-            elif content_type == 'api':
-                content_prompt = f"""Create a REST API for the file '{file_name}'.
-                
-Requirements:
-- Use Python with Flask
-- Include CRUD operations (GET, POST, PUT, DELETE)
-- Use JSON for data exchange
-- Include proper error handling and status codes
-- Add example endpoints
-- Include documentation in comments
-                
-Generate complete, functional Python code."""
-            
-            elif content_type == 'script':
-                content_prompt = f"""Create a Python script for the file '{file_name}' based on: {instruction}
-                
-Requirements:
-- Make it functional and ready to run
-- Include proper error handling
-- Add helpful comments
-- Use best practices
-- Include a main function if appropriate
-                
-Generate complete, functional Python code."""
+        except Exception as e:
+            print(CLIColors.error(f"❌ Error creating file: {str(e)}"))
+            return False
+    
+    def _generate_file_content(self, file_name: str, instruction: str, content_type: str) -> str:
+        """Generate file content using AI based on instruction and content type"""
+        try:
+            # Check if DeepSeek API key is available
+            if not self._has_api_key:
+                print(CLIColors.warning("🤖 Content generation requires DEEPSEEK_API_KEY to be set."))
+                return ""
             
-            elif content_type == 'config':
-                if file_ext in ['.json']:
-                    content_prompt = f"""Create a JSON configuration file for '{file_name}' based on: {instruction}
-                    
-Requirements:
-- Use proper JSON format
-- Include common configuration options
-- Add comments where possible (if JSON5 format)
-- Make it well-structured and readable
-                    
-Generate valid JSON content."""
-                elif file_ext in ['.yaml', '.yml']:
-                    content_prompt = f"""Create a YAML configuration file for '{file_name}' based on: {instruction}
-                    
-Requirements:
-- Use proper YAML format
-- Include common configuration options
-- Add comments explaining each section
-- Make it well-structured and readable
-                    
-Generate valid YAML content."""
-                else:
-                    content_prompt = f"""Create a configuration file for '{file_name}' based on: {instruction}
-                    
-Requirements:
-- Use appropriate format for the file extension
-- Include common configuration options
-- Add comments explaining settings
-- Make it well-structured and readable
-                    
-Generate valid configuration content."""
+            print(CLIColors.info(f"🤖 Generating {content_type} content..."))
             
-            elif content_type == 'readme':
-                content_prompt = f"""Create a README.md file for '{file_name}' based on: {instruction}
-                
-Requirements:
-- Use proper Markdown format
-- Include project title, description, installation, usage
-- Add examples if relevant
-- Include contributing guidelines
-- Make it comprehensive and helpful
-                
-Generate complete Markdown content."""
+            # Determine file extension and language
+            file_path = Path(file_name)
+            file_ext = file_path.suffix.lower()
             
-            else:  # 'other' or unknown content type
-                content_prompt = f"""Create content for the file '{file_name}' based on: {instruction}
-                
-Requirements:
-- Make it functional and appropriate for the file type
-- Include proper formatting for the file extension
-- Add helpful comments or documentation
-- Use best practices
-- Make it ready to use
-                
-Generate complete, functional content."""
+            # Create content generation prompt based on content type
+            template = (_PROMPT_TEMPLATES.get((content_type, file_ext))
+                        or _PROMPT_TEMPLATES.get((content_type, None))
+                        or _OTHER_PROMPT)
+            content_prompt = template.format(file_name=file_name, instruction=instruction)
             
             # Generate content using LLM
             system_prompt = "You are a code generator. Generate ONLY the actual code content that should go inside the file, not code that creates the file. Do not include any explanations, markdown formatting, file creation code, or additional text. Output should be the direct file content ready to write."
@@ -439,13 +913,10 @@ Generate complete, functional content."""
             
             # Clean up the content (remove markdown code blocks if present)
             content = content.strip()
-            if content.startswith('```'):
-                lines = content.split('\n')
-                # Remove first line (```language) and last line (```)
-                if len(lines) > 2 and lines[-1].strip() == '```':
-                    content = '\n'.join(lines[1:-1])
-                elif len(lines) > 1:
-                    content = '\n'.join(lines[1:])
+            # Remove first line (```language) and last line (```)
+            m = _FENCE_RE.match(content)
+            if m:
+                content = m.group(1)
             
             return content
             
@@ -456,24 +927,24 @@ Generate complete, functional content."""
     def delete_item(self, item_name: str) -> bool:
         """Delete a file or folder"""
         try:
-            item_path = Path(item_name)
-            if not item_path.is_absolute():
-                item_path = self.project_root / item_path
+            item_path = self._abs(item_name)
             
-            if not item_path.exists():
+            # one lstat answers both "exists?" and "dir?"; a symlink is removed as a link, never followed
+            try:
+                is_dir = stat.S_ISDIR(os.lstat(item_path).st_mode)
+            except FileNotFoundError:
                 print(CLIColors.error(f"❌ Item not found: {item_path}"))
                 return False
             
             # Ask for confirmation
-            item_type = "folder" if item_path.is_dir() else "file"
+            item_type = "folder" if is_dir else "file"
             response = input(CLIColors.warning(f"⚠️  Delete {item_type} '{item_path}'? (y/N): ")).strip().lower()
             
             if response in ['y', 'yes']:
-                if item_path.is_dir():
-                    import shutil
+                if is_dir:
                     shutil.rmtree(item_path)
                 else:
-                    item_path.unlink()
+                    os.unlink(item_path)
                 print(CLIColors.success(f"✅ Deleted {item_type}: {item_path}"))
                 return True
             else:
@@ -487,9 +958,7 @@ Generate complete, functional content."""
     def review_code(self, file_path: str, auto_fix: bool = False) -> bool:
         """Review code for errors, style issues, and quality"""
         try:
-            target_path = Path(file_path)
-            if not target_path.is_absolute():
-                target_path = self.project_root / target_path
+            target_path = self._abs(file_path)
             
             if not target_path.exists():
                 print(CLIColors.error(f"❌ File not found: {target_path}"))
@@ -524,15 +993,13 @@ Generate complete, functional content."""
     
     def _review_python_file(self, file_path: Path, auto_fix: bool = False) -> bool:
         """Review a Python file using various linting tools and AI"""
-        import subprocess
-        import tempfile
-        
         issues_found = False
         
-        # Read file content for AI review
+        # Read the bytes once: parsing and flake8 use them as-is, the text is for explanations and AI review
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                file_content = f.read()
+            raw = file_path.read_bytes()
+            # newlines normalised as read_text() would, so the line-based fixers never see a '\r'
+            file_content = raw.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
         except Exception as e:
             print(CLIColors.error(f"❌ Error reading file: {str(e)}"))
             return False
@@ -542,24 +1009,30 @@ Generate complete, functional content."""
         
         # 1. Syntax Check with detailed explanations
         print(CLIColors.info("📋 Checking syntax..."))
+        tree = None
+        source = None  # set to the fixed text if auto-fix rewrites the file
         try:
-            compile(file_content, str(file_path), 'exec')
+            # parse once; the tree feeds both compile() and the in-process checks below
+            tree = ast.parse(raw, str(file_path))
+            compile(tree, str(file_path), 'exec')
             print(CLIColors.success("✅ Syntax: No syntax errors found"))
         except SyntaxError as e:
             print(CLIColors.error(f"❌ Syntax Error: Line {e.lineno}: {e.msg}"))
             
-            # Provide detailed explanation and fix suggestions
-            self._explain_syntax_error(e, file_content, file_path)
+            # Provide detailed explanation and fix suggestions; the quote scan is shared with auto-fix
+            quotes = _quote_info(e, file_content)
+            self._explain_syntax_error(e, file_content, file_path, quotes)
             
             # Only auto-fix if explicitly requested
             if auto_fix:
-                if self._auto_fix_syntax_error(file_path, file_content, e):
+                fixed_content = self._auto_fix_syntax_error(file_path, file_content, e, quotes)
+                if fixed_content is not None:
                     print(CLIColors.success("🔧 Auto-fix applied! Re-checking syntax..."))
-                    # Re-read the file and check syntax again
+                    # Check the fixed content we just wrote, without reading it back
                     try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            fixed_content = f.read()
-                        compile(fixed_content, str(file_path), 'exec')
+                        source = fixed_content
+                        tree = ast.parse(fixed_content, str(file_path))
+                        compile(tree, str(file_path), 'exec')
                         print(CLIColors.success("✅ Syntax: Fixed! No syntax errors found"))
                     except SyntaxError:
                         print(CLIColors.warning("⚠️  Auto-fix applied but syntax error still exists"))
@@ -569,20 +1042,41 @@ Generate complete, functional content."""
             else:
                 issues_found = True
         
+        # 2-5. External linters. They start together (after any auto-fix above, so they see the
+        # final file); results are still reported in the usual order.
+        target = str(file_path)
+        data = raw if source is None else source.encode('utf-8')
+        pool = ThreadPoolExecutor(max_workers=len(LINTERS))
+        runs = {}
+        for name, argv, timeout in LINTERS:
+            if name in STDIN_LINTERS:
+                runs[name] = pool.submit(_run_tool, [sys.executable, '-m', *argv, target, '-'], timeout, data)
+            else:
+                runs[name] = pool.submit(_run_tool, [sys.executable, '-m', *argv, target], timeout)
+        pool.shutdown(wait=False)
+        
+        # Quick checks on the parsed tree (skipped if the file doesn't parse)
+        if tree is not None:
+            print(CLIColors.info("📋 Running quick checks..."))
+            quick = _quick_lint(tree)
+            if quick:
+                print(CLIColors.warning("⚠️  Quick Check Issues:"))
+                bullet = CLIColors.warning('•')
+                _write_lines([f"  {bullet} {line}" for line in quick])
+                issues_found = True
+            else:
+                print(CLIColors.success("✅ Quick checks: No unused imports or bare excepts"))
+        
         # 2. Flake8 (Style and Error Checking)
         print(CLIColors.info("📋 Running flake8 analysis..."))
         try:
-            result = subprocess.run(
-                ['python', '-m', 'flake8', '--max-line-length=88', str(file_path)],
-                capture_output=True, text=True, timeout=30
-            )
+            result = runs['flake8'].result()
             if result.returncode == 0:
                 print(CLIColors.success("✅ Flake8: No style issues found"))
             else:
                 print(CLIColors.warning("⚠️  Flake8 Issues:"))
-                for line in result.stdout.strip().split('\n'):
-                    if line.strip():
-                        print(f"  {CLIColors.warning('•')} {line}")
+                bullet = CLIColors.warning('•')
+                _write_lines([f"  {bullet} {line}" for line in result.stdout.splitlines() if line.strip()])
                 issues_found = True
         except (subprocess.TimeoutExpired, FileNotFoundError):
             print(CLIColors.warning("⚠️  Flake8 not available or timed out"))
@@ -592,23 +1086,24 @@ Generate complete, functional content."""
         # 3. Pylint (Comprehensive Analysis)
         print(CLIColors.info("📋 Running pylint analysis..."))
         try:
-            result = subprocess.run(
-                ['python', '-m', 'pylint', '--score=no', '--reports=no', str(file_path)],
-                capture_output=True, text=True, timeout=45
-            )
+            result = runs['pylint'].result()
             if result.stdout.strip():
                 print(CLIColors.warning("⚠️  Pylint Issues:"))
+                red, yellow, blue, bullet = (CLIColors.error('🔴'), CLIColors.warning('🟡'),
+                                             CLIColors.info('🔵'), CLIColors.warning('•'))
+                parts = []
                 for line in result.stdout.strip().split('\n'):
                     if line.strip() and not line.startswith('*'):
                         # Color code different issue types
                         if 'ERROR' in line or 'E:' in line:
-                            print(f"  {CLIColors.error('🔴')} {line}")
+                            parts.append(f"  {red} {line}")
                         elif 'WARNING' in line or 'W:' in line:
-                            print(f"  {CLIColors.warning('🟡')} {line}")
+                            parts.append(f"  {yellow} {line}")
                         elif 'INFO' in line or 'I:' in line:
-                            print(f"  {CLIColors.info('🔵')} {line}")
+                            parts.append(f"  {blue} {line}")
                         else:
-                            print(f"  {CLIColors.warning('•')} {line}")
+                            parts.append(f"  {bullet} {line}")
+                _write_lines(parts)
                 issues_found = True
             else:
                 print(CLIColors.success("✅ Pylint: No issues found"))
@@ -620,20 +1115,19 @@ Generate complete, functional content."""
         # 4. Bandit (Security Analysis)
         print(CLIColors.info("📋 Running bandit security analysis..."))
         try:
-            result = subprocess.run(
-                ['python', '-m', 'bandit', '-f', 'txt', str(file_path)],
-                capture_output=True, text=True, timeout=30
-            )
+            result = runs['bandit'].result()
             if 'No issues identified' in result.stdout:
                 print(CLIColors.success("✅ Bandit: No security issues found"))
             elif result.stdout.strip():
                 print(CLIColors.error("🔒 Security Issues Found:"))
-                lines = result.stdout.strip().split('\n')
-                for line in lines:
+                red = CLIColors.error('🔴')
+                parts = []
+                for line in result.stdout.strip().split('\n'):
                     if 'Issue:' in line or 'Severity:' in line or 'Confidence:' in line:
-                        print(f"  {CLIColors.error('🔴')} {line}")
+                        parts.append(f"  {red} {line}")
                     elif line.strip() and not line.startswith('Run started') and not line.startswith('Files skipped'):
-                        print(f"  {line}")
+                        parts.append(f"  {line}")
+                _write_lines(parts)
                 issues_found = True
         except (subprocess.TimeoutExpired, FileNotFoundError):
             print(CLIColors.warning("⚠️  Bandit not available or timed out"))
@@ -643,17 +1137,14 @@ Generate complete, functional content."""
         # 5. MyPy (Type Checking)
         print(CLIColors.info("📋 Running mypy type checking..."))
         try:
-            result = subprocess.run(
-                ['python', '-m', 'mypy', '--ignore-missing-imports', str(file_path)],
-                capture_output=True, text=True, timeout=30
-            )
+            result = runs['mypy'].result()
             if result.returncode == 0:
                 print(CLIColors.success("✅ MyPy: No type issues found"))
             else:
                 print(CLIColors.warning("⚠️  Type Issues:"))
-                for line in result.stdout.strip().split('\n'):
-                    if line.strip() and 'error:' in line:
-                        print(f"  {CLIColors.warning('🟡')} {line}")
+                yellow = CLIColors.warning('🟡')
+                _write_lines([f"  {yellow} {line}" for line in result.stdout.strip().split('\n')
+                              if line.strip() and 'error:' in line])
                 issues_found = True
         except (subprocess.TimeoutExpired, FileNotFoundError):
             print(CLIColors.warning("⚠️  MyPy not available or timed out"))
@@ -677,86 +1168,86 @@ Generate complete, functional content."""
         
         return True
     
-    def _explain_syntax_error(self, syntax_error: SyntaxError, file_content: str, file_path: Path) -> None:
+    def _explain_syntax_error(self, syntax_error: SyntaxError, file_content: str, file_path: Path,
+                              quotes: Optional[tuple] = None) -> None:
         """Provide detailed explanation and manual fix suggestions for syntax errors"""
-        lines = file_content.split('\n')
+        line_quotes, unclosed = quotes or _quote_info(syntax_error, file_content)
         error_line = syntax_error.lineno - 1 if syntax_error.lineno else 0
         error_msg = syntax_error.msg.lower()
+        # only the few lines around the error are materialized (same numbering as split('\n'))
+        n_lines = file_content.count('\n') + 1
+        start_line = max(0, error_line - 2)
+        end_line = min(n_lines, error_line + 3)
+        context = [ln[:-1] if ln.endswith('\n') else ln
+                   for ln in islice(io.StringIO(file_content), start_line, end_line)]
+        if len(context) < end_line - start_line:
+            context.append("")  # the empty piece after a trailing newline
         
-        print()
-        print(CLIColors.highlight("🔍 Detailed Error Analysis:"))
+        # the whole diagnostic is collected and written once at the end
+        out = ['', CLIColors.highlight("🔍 Detailed Error Analysis:")]
         
         # Show the problematic line with context
-        if error_line < len(lines):
-            start_line = max(0, error_line - 2)
-            end_line = min(len(lines), error_line + 3)
-            
-            print(CLIColors.info("📍 Code context:"))
+        if error_line < n_lines:
+            out.append(CLIColors.info("📍 Code context:"))
             for i in range(start_line, end_line):
                 line_num = i + 1
-                line_content = lines[i] if i < len(lines) else ""
+                line_content = context[i - start_line]
                 if i == error_line:
-                    print(f"  {CLIColors.error('→')} {line_num:3d}: {line_content}")
+                    out.append(f"  {CLIColors.error('→')} {line_num:3d}: {line_content}")
                     if syntax_error.offset:
-                        print(f"      {' ' * (len(str(line_num)) + syntax_error.offset + 1)}^")
+                        out.append(f"      {' ' * (len(str(line_num)) + syntax_error.offset + 1)}^")
                 else:
-                    print(f"    {line_num:3d}: {line_content}")
+                    out.append(f"    {line_num:3d}: {line_content}")
         
-        print()
-        print(CLIColors.info("💡 Error Explanation & Fix Suggestions:"))
+        out += ['', CLIColors.info("💡 Error Explanation & Fix Suggestions:")]
         
         # Provide specific explanations and fix suggestions
         if 'unterminated string literal' in error_msg or 'eol while scanning string literal' in error_msg:
-            print("  • Problem: String is missing a closing quote")
-            print("  • Fix: Add the missing quote (\" or ') at the end of the string")
-            if error_line < len(lines):
-                line = lines[error_line]
-                if '"' in line and line.count('"') % 2 == 1:
-                    print(f"  • Suggested fix: Add \" at the end of line {error_line + 1}")
-                elif "'" in line and line.count("'") % 2 == 1:
-                    print(f"  • Suggested fix: Add ' at the end of line {error_line + 1}")
+            out.append("  • Problem: String is missing a closing quote")
+            out.append("  • Fix: Add the missing quote (\" or ') at the end of the string")
+            if line_quotes is not None:
+                single, double = line_quotes
+                if double % 2 == 1:
+                    out.append(f"  • Suggested fix: Add \" at the end of line {error_line + 1}")
+                elif single % 2 == 1:
+                    out.append(f"  • Suggested fix: Add ' at the end of line {error_line + 1}")
         
-        elif 'eof while scanning triple-quoted string literal' in error_msg:
-            print("  • Problem: Triple-quoted string (\"\"\" or ''') is never closed")
-            print("  • Fix: Add the closing triple quotes at the end of the docstring/multiline string")
+        elif 'triple-quoted string literal' in error_msg:
+            out.append("  • Problem: Triple-quoted string (\"\"\" or ''') is never closed")
+            out.append("  • Fix: Add the closing triple quotes at the end of the docstring/multiline string")
             
-            # Find the unclosed triple quote
-            for i in range(len(lines) - 1, -1, -1):
-                line = lines[i]
-                if '"""' in line and line.count('"""') % 2 == 1:
-                    print(f"  • Unclosed triple quote found at line {i + 1}")
-                    print(f"  • Suggested fix: Add \"\"\" at the end of the file or where the docstring should end")
-                    break
-                elif "'''" in line and line.count("'''") % 2 == 1:
-                    print(f"  • Unclosed triple quote found at line {i + 1}")
-                    print(f"  • Suggested fix: Add ''' at the end of the file or where the docstring should end")
-                    break
+            if unclosed:
+                out.append(f"  • Unclosed triple quote found at line {unclosed[0] + 1}")
+                out.append(f"  • Suggested fix: Add {unclosed[1]} at the end of the file or where the docstring should end")
         
         elif 'invalid syntax' in error_msg and syntax_error.text:
             if '(' in syntax_error.text and ')' not in syntax_error.text:
-                print("  • Problem: Missing closing parenthesis")
-                print(f"  • Fix: Add ')' to close the parenthesis on line {error_line + 1}")
+                out.append("  • Problem: Missing closing parenthesis")
+                out.append(f"  • Fix: Add ')' to close the parenthesis on line {error_line + 1}")
             
-            elif any(keyword in syntax_error.text for keyword in ['if ', 'for ', 'while ', 'def ', 'class ', 'try:', 'except', 'else', 'elif']):
+            elif _CONTROL_KW_RE.search(syntax_error.text):
                 if not syntax_error.text.strip().endswith(':'):
-                    print("  • Problem: Missing colon (:) at the end of control structure")
-                    print(f"  • Fix: Add ':' at the end of line {error_line + 1}")
+                    out.append("  • Problem: Missing colon (:) at the end of control structure")
+                    out.append(f"  • Fix: Add ':' at the end of line {error_line + 1}")
             else:
-                print("  • Problem: Invalid Python syntax")
-                print("  • Fix: Check for typos, missing operators, or incorrect indentation")
+                out.append("  • Problem: Invalid Python syntax")
+                out.append("  • Fix: Check for typos, missing operators, or incorrect indentation")
         
         else:
-            print("  • Problem: Syntax error detected")
-            print("  • Fix: Review the code structure and Python syntax rules")
+            out.append("  • Problem: Syntax error detected")
+            out.append("  • Fix: Review the code structure and Python syntax rules")
         
-        print()
-        print(CLIColors.warning("💡 To automatically fix this error, use: review --fix <filename>"))
-        print()
+        out += ['', _AUTOFIX_HINT, '']
+        sys.stdout.write('\n'.join(out) + '\n')
     
-    def _auto_fix_syntax_error(self, file_path: Path, file_content: str, syntax_error: SyntaxError) -> bool:
-        """Attempt to automatically fix common syntax errors"""
+    def _auto_fix_syntax_error(self, file_path: Path, file_content: str, syntax_error: SyntaxError,
+                               quotes: Optional[tuple] = None) -> Optional[str]:
+        """
+        Attempt to automatically fix common syntax errors; returns the fixed content that was written, or None.
+        The _fix_* helpers only build the new text; _commit_fix rewrites the file once.
+        """
         try:
-            lines = file_content.split('\n')
+            line_quotes, unclosed = quotes or _quote_info(syntax_error, file_content)
             error_line = syntax_error.lineno - 1 if syntax_error.lineno else 0
             error_msg = syntax_error.msg.lower()
             
@@ -764,149 +1255,112 @@ Generate complete, functional content."""
             
             # Fix unterminated string literals
             if 'unterminated string literal' in error_msg or 'eol while scanning string literal' in error_msg:
-                return self._fix_unterminated_string(file_path, lines, error_line)
+                return _commit_fix(file_path, self._fix_unterminated_string(file_content, error_line, line_quotes))
             
             # Fix unterminated triple-quoted strings
-            elif 'eof while scanning triple-quoted string literal' in error_msg:
-                return self._fix_unterminated_triple_quote(file_path, lines, error_line)
+            elif 'triple-quoted string literal' in error_msg:
+                return _commit_fix(file_path, self._fix_unterminated_triple_quote(file_content, unclosed))
             
             # Fix missing parentheses
             elif 'invalid syntax' in error_msg and syntax_error.text:
                 if '(' in syntax_error.text and ')' not in syntax_error.text:
-                    return self._fix_missing_parenthesis(file_path, lines, error_line)
+                    return _commit_fix(file_path, self._fix_missing_parenthesis(file_content, error_line))
             
             # Fix missing colons
             elif 'invalid syntax' in error_msg and syntax_error.text:
                 text = syntax_error.text.strip()
-                if any(keyword in text for keyword in ['if ', 'for ', 'while ', 'def ', 'class ', 'try:', 'except', 'else', 'elif']):
-                    if not text.endswith(':'):
-                        return self._fix_missing_colon(file_path, lines, error_line)
+                if _CONTROL_KW_RE.search(text) and not text.endswith(':'):
+                    return _commit_fix(file_path, self._fix_missing_colon(file_content, error_line))
             
-            print(CLIColors.warning("⚠️  Auto-fix not available for this type of syntax error"))
-            return False
+            print(_AUTOFIX_UNAVAILABLE)
+            return None
             
         except Exception as e:
             print(CLIColors.error(f"❌ Error during auto-fix: {str(e)}"))
-            return False
+            return None
     
-    def _fix_unterminated_string(self, file_path: Path, lines: list, error_line: int) -> bool:
+    def _fix_unterminated_string(self, file_content: str, error_line: int,
+                                 line_quotes: Optional[tuple]) -> Optional[str]:
         """Fix unterminated string literals"""
         try:
-            if error_line < len(lines):
-                line = lines[error_line]
+            span = _line_span(file_content, error_line)
+            if span:
+                line = file_content[span[0]:span[1]]
+                single, double = line_quotes
                 # Find the unterminated string and add closing quote
-                if '"' in line and line.count('"') % 2 == 1:
-                    lines[error_line] = line + '"'
-                elif "'" in line and line.count("'") % 2 == 1:
-                    lines[error_line] = line + "'"
+                if double % 2 == 1:
+                    fixed = _replace_line(file_content, span, line + '"')
+                elif single % 2 == 1:
+                    fixed = _replace_line(file_content, span, line + "'")
                 else:
-                    return False
-                
-                # Write the fixed content back to file
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write('\n'.join(lines))
+                    return None
                 
                 print(CLIColors.success(f"🔧 Fixed unterminated string on line {error_line + 1}"))
-                return True
+                return fixed
         except Exception:
-            return False
-        return False
+            return None
+        return None
     
-    def _fix_unterminated_triple_quote(self, file_path: Path, lines: list, error_line: int) -> bool:
-        """Fix unterminated triple-quoted strings"""
+    def _fix_unterminated_triple_quote(self, file_content: str, unclosed: Optional[tuple]) -> Optional[str]:
+        """Fix unterminated triple-quoted strings (unclosed as from _unclosed_triple_quote)"""
         try:
-            # Look for the start of the triple-quoted string
-            triple_quote_start = -1
-            quote_type = None
-            
-            # Search backwards from the end of file to find the unterminated triple quote
-            for i in range(len(lines) - 1, -1, -1):
-                line = lines[i]
-                if '"""' in line:
-                    # Count the number of triple quotes in this line
-                    count = line.count('"""')
-                    if count % 2 == 1:  # Odd number means one is unterminated
-                        triple_quote_start = i
-                        quote_type = '"""'
-                        break
-                elif "'''" in line:
-                    count = line.count("'''")
-                    if count % 2 == 1:
-                        triple_quote_start = i
-                        quote_type = "'''"
-                        break
-            
-            if triple_quote_start >= 0 and quote_type:
-                # Add the closing triple quote at the end of the file
-                lines.append(quote_type)
+            if unclosed:
+                start, quote_type = unclosed
+                # Add the closing triple quote on a new last line
+                fixed = file_content + '\n' + quote_type
                 
-                # Write the fixed content back to file
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write('\n'.join(lines))
-                
-                print(CLIColors.success(f"🔧 Fixed unterminated triple-quoted string starting at line {triple_quote_start + 1}"))
-                return True
+                print(CLIColors.success(f"🔧 Fixed unterminated triple-quoted string starting at line {start + 1}"))
+                return fixed
                 
         except Exception:
-            return False
-        return False
+            return None
+        return None
     
-    def _fix_missing_parenthesis(self, file_path: Path, lines: list, error_line: int) -> bool:
+    def _fix_missing_parenthesis(self, file_content: str, error_line: int) -> Optional[str]:
         """Fix missing closing parenthesis"""
         try:
-            if error_line < len(lines):
-                line = lines[error_line]
-                open_parens = line.count('(')
-                close_parens = line.count(')')
+            span = _line_span(file_content, error_line)
+            if span:
+                line = file_content[span[0]:span[1]]
+                missing = line.count('(') - line.count(')')
                 
-                if open_parens > close_parens:
-                    lines[error_line] = line + ')' * (open_parens - close_parens)
-                    
-                    with open(file_path, 'w', encoding='utf-8') as f:
-                        f.write('\n'.join(lines))
+                if missing > 0:
+                    fixed = _replace_line(file_content, span, line + ')' * missing)
                     
                     print(CLIColors.success(f"🔧 Fixed missing parenthesis on line {error_line + 1}"))
-                    return True
+                    return fixed
         except Exception:
-            return False
-        return False
+            return None
+        return None
     
-    def _fix_missing_colon(self, file_path: Path, lines: list, error_line: int) -> bool:
+    def _fix_missing_colon(self, file_content: str, error_line: int) -> Optional[str]:
         """Fix missing colon in control structures"""
         try:
-            if error_line < len(lines):
-                line = lines[error_line].rstrip()
+            span = _line_span(file_content, error_line)
+            if span:
+                line = file_content[span[0]:span[1]].rstrip()
                 if not line.endswith(':'):
-                    lines[error_line] = line + ':'
-                    
-                    with open(file_path, 'w', encoding='utf-8') as f:
-                        f.write('\n'.join(lines))
+                    fixed = _replace_line(file_content, span, line + ':')
                     
                     print(CLIColors.success(f"🔧 Fixed missing colon on line {error_line + 1}"))
-                    return True
+                    return fixed
         except Exception:
-            return False
-        return False
+            return None
+        return None
     
     def _review_javascript_file(self, file_path: Path) -> bool:
         """Review a JavaScript/TypeScript file"""
-        import subprocess
-        
         print(CLIColors.info("📋 Running JavaScript/TypeScript analysis..."))
         
         # Try ESLint
         try:
-            result = subprocess.run(
-                ['npx', 'eslint', str(file_path)],
-                capture_output=True, text=True, timeout=30
-            )
+            result = _run_tool(['npx', 'eslint', str(file_path)], 30)
             if result.returncode == 0:
                 print(CLIColors.success("✅ ESLint: No issues found"))
             else:
                 print(CLIColors.warning("⚠️  ESLint Issues:"))
-                for line in result.stdout.strip().split('\n'):
-                    if line.strip():
-                        print(f"  {CLIColors.warning('•')} {line}")
+                bullet = CLIColors.warning('•')
+                _write_lines([f"  {bullet} {line}" for line in result.stdout.splitlines() if line.strip()])
         except (subprocess.TimeoutExpired, FileNotFoundError):
             print(CLIColors.warning("⚠️  ESLint not available. Install with: npm install -g eslint"))
         except Exception as e:
@@ -914,11 +1368,13 @@ Generate complete, functional content."""
         
         # AI Review for JS/TS
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                file_content = f.read()
             print()
             print(CLIColors.highlight("🤖 AI-Powered Code Review..."))
-            self._ai_code_review(file_content, str(file_path))
+            # size check first, so an oversize file is never read
+            if file_path.stat().st_size > MAX_REVIEW_BYTES:
+                print(_REVIEW_TOO_LARGE)
+            else:
+                self._ai_code_review(file_path.read_bytes().decode('utf-8'), str(file_path))
         except Exception as e:
             print(CLIColors.error(f"❌ Error reading file for AI review: {str(e)}"))
         
@@ -928,35 +1384,20 @@ Generate complete, functional content."""
         """Perform AI-powered code review"""
         try:
             # Check if DeepSeek API key is available
-            api_key = os.getenv('DEEPSEEK_API_KEY')
-            if not api_key:
+            if not self._has_api_key:
                 print(CLIColors.warning("🤖 AI code review requires DEEPSEEK_API_KEY to be set."))
                 return False
             
-            # Create AI review prompt
-            review_prompt = f"""Please review this code file and provide a comprehensive analysis:
-
-File: {file_path}
-
-Code:
-```
-{file_content}
-```
-
-Please analyze:
-1. Code quality and best practices
-2. Potential bugs or logical errors
-3. Performance considerations
-4. Security vulnerabilities
-5. Maintainability and readability
-6. Suggestions for improvement
-
-Provide specific, actionable feedback with line references where applicable."""
+            # cheap length check before building the prompt (chars <= encoded bytes)
+            if len(file_content) > MAX_REVIEW_BYTES:
+                print(_REVIEW_TOO_LARGE)
+                return False
             
-            system_prompt = "You are an expert code reviewer. Provide detailed, constructive feedback on code quality, potential issues, and improvements. Be specific and reference line numbers when possible."
+            # Create AI review prompt
+            review_prompt = ''.join((_REVIEW_PREFIX_FMT.format(path=file_path), file_content, _REVIEW_SUFFIX))
             
             print(CLIColors.info("🤖 Analyzing code with AI..."))
-            ai_response = self.llm.generate_text(review_prompt, system_prompt)
+            ai_response = self.llm.generate_text(review_prompt, _REVIEW_SYSTEM_PROMPT)
             
             if ai_response:
                 print(CLIColors.highlight("🤖 AI Code Review Results:"))
@@ -972,85 +1413,28 @@ Provide specific, actionable feedback with line references where applicable."""
     
     def _handle_natural_language_command(self, user_input: str) -> bool:
         """Handle natural language commands using AI interpretation"""
+        if not _NL_VERB_RE.search(user_input):
+            return False
         try:
             # Check if DeepSeek API key is available
-            api_key = os.getenv('DEEPSEEK_API_KEY')
-            if not api_key:
+            if not self._has_api_key:
                 print(CLIColors.warning("🤖 AI interpretation requires DEEPSEEK_API_KEY to be set."))
                 return False
             
             print(CLIColors.info("🤖 Interpreting your command with AI..."))
             
             # Create a prompt for command interpretation
-            interpretation_prompt = f"""You are a CLI command interpreter. The user said: "{user_input}"
-
-Analyze this command and determine what the user wants to do. Respond with a JSON object containing:
-{{
-  "action": "create_folder" | "create_file" | "create_file_with_content" | "delete" | "edit" | "list" | "run" | "plan" | "review" | "fix" | "unknown",
-  "target": "the file/folder name or path",
-  "instruction": "additional instruction if needed (for content generation)",
-  "content_type": "calculator" | "web_server" | "api" | "script" | "config" | "readme" | "empty" | "other",
-  "confidence": 0.0-1.0
-}}
-
-Examples:
-- "make new folder name like 'test example 1'" -> {{"action": "create_folder", "target": "test example 1", "confidence": 0.9}}
-- "create a new folder and name 'example test 1'" -> {{"action": "create_folder", "target": "example test 1", "confidence": 0.9}}
-- "create a new folder and name \"example tset 1\"" -> {{"action": "create_folder", "target": "example tset 1", "confidence": 0.9}}
-- "make a folder called test" -> {{"action": "create_folder", "target": "test", "confidence": 0.9}}
-- "create directory named xyz" -> {{"action": "create_folder", "target": "xyz", "confidence": 0.9}}
-- "create a file called readme.txt" -> {{"action": "create_file", "target": "readme.txt", "confidence": 0.9}}
-- "access to the test folder and create a new python file about a calculator" -> {{"action": "create_file_with_content", "target": "test/calculator.py", "instruction": "create a calculator", "content_type": "calculator", "confidence": 0.9}}
-- "create a calculator python file" -> {{"action": "create_file_with_content", "target": "calculator.py", "instruction": "create a calculator", "content_type": "calculator", "confidence": 0.9}}
-- "make a web server script" -> {{"action": "create_file_with_content", "target": "server.py", "instruction": "create a web server", "content_type": "web_server", "confidence": 0.9}}
-- "delete the old logs folder" -> {{"action": "delete", "target": "logs", "confidence": 0.8}}
-- "show me what's in the src directory" -> {{"action": "list", "target": "src", "confidence": 0.9}}
-- "review the supermarket checkout code" -> {{"action": "review", "target": "test/supermarket_checkout.py", "confidence": 0.9}}
-- "check for errors in app.py" -> {{"action": "review", "target": "app.py", "confidence": 0.9}}
-- "fix the supermarket checkout file" -> {{"action": "fix", "target": "test/supermarket_checkout.py", "confidence": 0.9}}
-- "fix errors in main.py" -> {{"action": "fix", "target": "main.py", "confidence": 0.9}}
-
-Pay special attention to:
-1. Folder/directory creation commands with keywords: "create", "make", "new", "folder", "directory", "dir"
-2. File creation with specific functionality: "calculator", "web server", "API", "script", etc.
-3. Extract the folder/file name from quotes or after words like "name", "called", "named"
-4. Detect when user wants functional code vs empty file
-
-Use "create_file_with_content" when the user specifies what the file should do (calculator, server, etc.)
-Use "create_file" for simple empty file creation
-
-Only respond with the JSON object, no other text."""
+            interpretation_prompt = _NL_PROMPT_PREFIX + user_input + _NL_PROMPT_SUFFIX
             
             # Use LLM to interpret the command
-            system_prompt = "You are a CLI command interpreter that responds only with valid JSON."
-            response = self.llm.generate_text(interpretation_prompt, system_prompt)
+            response = self.llm.generate_text(interpretation_prompt, _NL_SYSTEM_PROMPT)
             
             # Try to parse the JSON response
             try:
-                import json
-                # Extract JSON from response if it contains other text
-                response_clean = response.strip()
-                if response_clean.startswith('```'):
-                    lines = response_clean.split('\n')
-                    json_lines = []
-                    in_json = False
-                    for line in lines:
-                        if line.strip().startswith('{') or in_json:
-                            in_json = True
-                            json_lines.append(line)
-                            if line.strip().endswith('}'):
-                                break
-                    response_clean = '\n'.join(json_lines)
-                
-                # Try to find JSON in the response
-                if not response_clean.startswith('{'):
-                    # Look for JSON object in the response
-                    import re
-                    json_match = re.search(r'\{[^}]*\}', response_clean, re.DOTALL)
-                    if json_match:
-                        response_clean = json_match.group(0)
-                    else:
-                        raise json.JSONDecodeError("No JSON found", response_clean, 0)
+                # Extract the JSON object even if it's fenced or surrounded by other text
+                response_clean = _extract_json_object(response)
+                if response_clean is None:
+                    raise json.JSONDecodeError("No JSON found", response, 0)
                 interpretation = json.loads(response_clean)
                 
                 action = interpretation.get('action', 'unknown')
@@ -1099,172 +1483,89 @@ Only respond with the JSON object, no other text."""
             print(CLIColors.error(f"🤖 Error interpreting command: {str(e)}"))
             return False
     
+    def _cmd_edit(self, rest: str):
+        """edit <filepath> <instruction>"""
+        # only the path is tokenized; the instruction keeps its quotes and apostrophes
+        filepath, instruction = _split_first(rest)
+        if not filepath or not instruction:
+            return _BAD_ARGS
+        return self.edit_file(filepath, instruction)
+    
+    def _cmd_ls(self, args: list):
+        """ls [directory]"""
+        return self.list_files(' '.join(args) or ".")
+    
+    def _cmd_run(self, rest: str):
+        """run <command>"""
+        # the text goes to the shell untouched, so pipes, && and $VARS keep working
+        return self.run_command(rest)
+    
+    def _cmd_review(self, args: list):
+        """review <filepath> [--fix]"""
+        auto_fix = '--fix' in args
+        review_args = [a for a in args if a != '--fix']
+        if not review_args:
+            return _BAD_ARGS
+        return self.review_code(' '.join(review_args), auto_fix)
+    
+    def _cmd_fix(self, args: list):
+        """fix <filepath>"""
+        return self.edit_file(' '.join(args), "fix errors or issues in the file")
+    
     def interactive_mode(self):
         """Start interactive CLI mode"""
-        # Display VSCODE ASCII art
-        ascii_art = """
- ██╗   ██╗███████╗ ██████╗ ██████╗ ██████╗ ███████╗ 
- ██║   ██║██╔════╝██╔════╝██╔═══██╗██╔══██╗██╔════╝ 
- ██║   ██║█████╗  ██║     ██║   ██║██║  ██║█████╗  
- ╚██╗ ██╔╝██╔══╝  ██║     ██║   ██║██║  ██║██╔══╝  
-  ╚████╔╝ ███████╗╚██████╗╚██████╔╝██████╔╝███████╗ 
-   ╚═══╝  ╚══════╝ ╚═════╝ ╚═════╝ ╚═════╝ ╚══════╝
-"""
-        print(CLIColors.highlight(ascii_art))
-        print()
-        
-        print(CLIColors.highlight("🚀 VSCode AI Agent - Interactive Mode"))
-        print(CLIColors.info(f"📁 Project Root: {self.project_root}"))
-        print(CLIColors.info("💡 Type 'help' for available commands, 'exit' to quit."))
-        print(CLIColors.info("🤖 AI-powered: I can understand natural language commands!"))
-        print()
+        sys.stdout.write(_STARTUP_BANNER.format(root=self.project_root))
         
         while True:
             try:
-                user_input = input(CLIColors.highlight("ai-agent> ")).strip()
+                user_input = input(_PROMPT_COLORED).strip()
                 
                 if not user_input:
                     continue
                 
                 if user_input.lower() in ['exit', 'quit', 'q']:
-                    print(CLIColors.success("👋 Goodbye!"))
+                    print(_GOODBYE_COLORED)
                     break
                 
                 if user_input.lower() in ['help', 'h']:
                     self._show_interactive_help()
                     continue
                 
-                # Parse interactive commands
+                # Parse interactive commands: the rest of the line is tokenized once here, so
+                # quoted names arrive as one argument; raw handlers (run, edit) get it as typed
                 parts = user_input.split(maxsplit=1)
                 command = parts[0].lower()
-                args = parts[1] if len(parts) > 1 else ""
-                
-                if command == 'edit':
-                    if not args:
-                        print(CLIColors.error("❌ Usage: edit <filepath> <instruction>"))
-                        continue
-                    
-                    edit_parts = args.split(maxsplit=1)
-                    if len(edit_parts) < 2:
-                        print(CLIColors.error("❌ Usage: edit <filepath> <instruction>"))
-                        continue
-                    
-                    filepath, instruction = edit_parts
-                    self.edit_file(filepath, instruction)
-                
-                elif command == 'ls' or command == 'list':
-                    directory = args if args else "."
-                    self.list_files(directory)
-                
-                elif command == 'run':
-                    if not args:
-                        print(CLIColors.error("❌ Usage: run <command>"))
-                        continue
-                    self.run_command(args)
-                
-                elif command == 'plan':
-                    if not args:
-                        print(CLIColors.error("❌ Usage: plan <task_description>"))
-                        continue
-                    self.plan_task(args)
-                
-                elif command in ['mkdir', 'md', 'create-folder', 'create-dir']:
-                    if not args:
-                        print(CLIColors.error("❌ Usage: mkdir <folder_name>"))
-                        continue
-                    self.create_folder(args)
-                
-                elif command in ['touch', 'create-file', 'new-file']:
-                    if not args:
-                        print(CLIColors.error("❌ Usage: touch <file_name>"))
-                        continue
-                    self.create_file(args)
-                
-                elif command == 'review':
-                    if not args:
-                        print(CLIColors.error("❌ Usage: review <filepath> [--fix]"))
-                        continue
-                    
-                    # Parse review command arguments
-                    review_args = args.split()
-                    auto_fix = '--fix' in review_args
-                    if auto_fix:
-                        review_args.remove('--fix')
-                    
-                    if not review_args:
-                        print(CLIColors.error("❌ Usage: review <filepath> [--fix]"))
-                        continue
-                    
-                    file_path = ' '.join(review_args)
-                    self.review_code(file_path, auto_fix)
-                
-                elif command == 'fix':
-                    if not args:
-                        print(CLIColors.error("❌ Usage: fix <filepath>"))
-                        continue
-                    self.edit_file(args, "fix errors or issues in the file")
-                
-                elif command in ['rm', 'delete', 'remove']:
-                    if not args:
-                        print(CLIColors.error("❌ Usage: rm <file_or_folder>"))
-                        continue
-                    self.delete_item(args)
+                rest = parts[1] if len(parts) > 1 else ""
                 
-                else:
+                entry = self._dispatch.get(command)
+                if entry is None:
                     # Try AI-powered natural language interpretation
                     if not self._handle_natural_language_command(user_input):
                         print(CLIColors.error(f"❌ Unknown command: {command}"))
                         print(CLIColors.info("💡 Type 'help' for available commands."))
+                else:
+                    handler, usage, raw = entry
+                    args = rest if raw else _split_args(rest)
+                    if (usage and not args) or handler(args) is _BAD_ARGS:
+                        print(usage)
+                        continue
                 
                 print()  # Add spacing between commands
                 
             except KeyboardInterrupt:
-                print("\n" + CLIColors.success("👋 Goodbye!"))
+                print("\n" + _GOODBYE_COLORED)
                 break
             except EOFError:
-                print("\n" + CLIColors.success("👋 Goodbye!"))
+                print("\n" + _GOODBYE_COLORED)
                 break
     
     def _show_interactive_help(self):
         """Show help for interactive mode"""
-        help_text = """
-🔧 Available Commands:
-
-  edit <filepath> <instruction>  - Edit a file with AI assistance
-  fix <filepath>                 - Fix errors or issues in a file
-  ls [directory]                 - List files in directory (default: current)
-  list [directory]               - Alias for 'ls'
-  run <command>                  - Execute a terminal command
-  plan <task_description>        - Create a plan for a task
-  mkdir <folder_name>            - Create a new folder
-  touch <file_name>              - Create a new file
-  rm <file_or_folder>            - Delete a file or folder
-  review <filepath> [--fix]      - Review code for errors and quality (use --fix to auto-fix issues)
-  help                          - Show this help message
-  exit                          - Exit interactive mode
-
-🤖 AI-Powered Natural Language:
-  You can also use natural language! Try commands like:
-  "make new folder called test"
-  "create a file named readme.txt"
-  "delete the old logs folder"
-  "show me what's in the src directory"
-  "review the supermarket checkout code"
-  "check for errors in my Python file"
-
-📝 Examples:
-  edit main.py "add error handling"
-  ls src/
-  run "npm install"
-  plan "create a REST API for user management"
-  mkdir "my new project"
-  touch config.json
-  review app.py
-"""
-        print(CLIColors.info(help_text))
+        sys.stdout.write(_HELP_OUTPUT)
 
-def create_parser() -> argparse.ArgumentParser:
-    """Create and configure the argument parser"""
+def create_parser(only: Optional[str] = None) -> "argparse.ArgumentParser":
+    """Create and configure the argument parser; with `only`, build just that subcommand"""
+    import argparse
     parser = argparse.ArgumentParser(
         description="VSCode AI Agent CLI - AI-powered development assistant",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -1280,6 +1581,12 @@ For more information, visit: https://github.com/your-repo/vscode-ai-agent
 """
     )
     
+    parser.add_argument(
+        "--version", "-v",
+        action="version",
+        version=f"%(prog)s {__version__}"
+    )
+    
     parser.add_argument(
         "--project-root", "-p",
         type=str,
@@ -1288,47 +1595,92 @@ For more information, visit: https://github.com/your-repo/vscode-ai-agent
     
     subparsers = parser.add_subparsers(dest="command", help="Available commands")
     
-    # Edit command
+    for name, build in _SUBPARSERS.items():
+        if only is None or name == only:
+            build(subparsers)
+    
+    return parser
+
+def _build_parser_edit(subparsers) -> None:
     edit_parser = subparsers.add_parser("edit", help="Edit a file with AI assistance")
     edit_parser.add_argument("filepath", help="Path to the file to edit")
     edit_parser.add_argument("instruction", help="Instruction for the AI on how to edit the file")
-    
-    # List command
+
+def _build_parser_list(subparsers) -> None:
     list_parser = subparsers.add_parser("list", help="List files in a directory")
     list_parser.add_argument("directory", nargs="?", default=".", help="Directory to list (default: current)")
-    
-    # Run command
+
+def _build_parser_run(subparsers) -> None:
     run_parser = subparsers.add_parser("run", help="Execute a terminal command")
     run_parser.add_argument("cmd", help="Command to execute")
-    
-    # Plan command
+
+def _build_parser_plan(subparsers) -> None:
     plan_parser = subparsers.add_parser("plan", help="Create a plan for a task")
     plan_parser.add_argument("task", help="Task description to plan")
-    
-    # Mkdir command
+
+def _build_parser_mkdir(subparsers) -> None:
     mkdir_parser = subparsers.add_parser("mkdir", help="Create a new folder")
     mkdir_parser.add_argument("folder_name", help="Name of the folder to create")
-    
-    # Touch command
+
+def _build_parser_touch(subparsers) -> None:
     touch_parser = subparsers.add_parser("touch", help="Create a new file")
     touch_parser.add_argument("file_name", help="Name of the file to create")
-    
-    # Remove command
+
+def _build_parser_rm(subparsers) -> None:
     rm_parser = subparsers.add_parser("rm", help="Delete a file or folder")
     rm_parser.add_argument("item_name", help="Name of the file or folder to delete")
-    
-    # Review command
+
+def _build_parser_review(subparsers) -> None:
     review_parser = subparsers.add_parser("review", help="Review code for errors and quality")
     review_parser.add_argument("filepath", help="Path to the file to review")
-    
-    # Interactive command
+
+def _build_parser_interactive(subparsers) -> None:
     subparsers.add_parser("interactive", help="Start interactive mode")
-    
-    return parser
+
+# registration order is the order shown in --help
+_SUBPARSERS = {
+    "edit": _build_parser_edit,
+    "list": _build_parser_list,
+    "run": _build_parser_run,
+    "plan": _build_parser_plan,
+    "mkdir": _build_parser_mkdir,
+    "touch": _build_parser_touch,
+    "rm": _build_parser_rm,
+    "review": _build_parser_review,
+    "interactive": _build_parser_interactive,
+}
+
+def _sniff_subcommand(argv: list) -> Optional[str]:
+    """Return the subcommand named in argv, or None if there isn't a known one."""
+    args = iter(argv[1:])
+    for tok in args:
+        if tok in ("-p", "--project-root"):
+            next(args, None)
+        elif tok in _SUBPARSERS:
+            return tok
+        elif not tok.startswith("-"):
+            return None
+    return None
+
+# built once at import; each maps (cli, parsed args) to the command's success flag
+_HANDLERS = {
+    "edit": lambda cli, args: cli.edit_file(args.filepath, args.instruction),
+    "list": lambda cli, args: cli.list_files(args.directory),
+    "run": lambda cli, args: cli.run_command(args.cmd),
+    "plan": lambda cli, args: cli.plan_task(args.task),
+    "mkdir": lambda cli, args: cli.create_folder(args.folder_name),
+    "touch": lambda cli, args: cli.create_file(args.file_name),
+    "rm": lambda cli, args: cli.delete_item(args.item_name),
+    "review": lambda cli, args: cli.review_code(args.filepath),
+    "interactive": lambda cli, args: (cli.interactive_mode(), True)[1],
+}
 
 def main():
     """Main CLI entry point"""
-    parser = create_parser()
+    _fast_path(sys.argv)
+    _init_colors()
+    # unknown or missing subcommands get the full parser so argparse can list the choices
+    parser = create_parser(_sniff_subcommand(sys.argv))
     args = parser.parse_args()
     
     # Initialize CLI
@@ -1344,36 +1696,9 @@ def main():
         parser.print_help()
         sys.exit(0)
     
-    success = True
-    
-    if args.command == "edit":
-        success = cli.edit_file(args.filepath, args.instruction)
-    
-    elif args.command == "list":
-        success = cli.list_files(args.directory)
-    
-    elif args.command == "run":
-        success = cli.run_command(args.cmd)
-    
-    elif args.command == "plan":
-        success = cli.plan_task(args.task)
-    
-    elif args.command == "mkdir":
-        success = cli.create_folder(args.folder_name)
-    
-    elif args.command == "touch":
-        success = cli.create_file(args.file_name)
-    
-    elif args.command == "rm":
-        success = cli.delete_item(args.item_name)
-    
-    elif args.command == "review":
-        success = cli.review_code(args.filepath)
-    
-    elif args.command == "interactive":
-        cli.interactive_mode()
-        success = True
-    
+    handler = _HANDLERS.get(args.command)
+    if handler is not None:
+        success = handler(cli, args)
     else:
         print(CLIColors.error(f"❌ Unknown command: {args.command}"))
         parser.print_help()
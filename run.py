@@ -1,15 +1,23 @@
 import uvicorn
 import os
+from importlib.util import find_spec
 
-# Load environment variables from .env file
-try:
-    from dotenv import load_dotenv
-    load_dotenv()
-except ImportError:
-    pass  # python-dotenv not installed, skip loading
+# Load environment variables from .env file (AGENT_LOAD_DOTENV=0 skips the lookup, e.g. in containers)
+if os.environ.get("AGENT_LOAD_DOTENV", "1") == "1":
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass  # python-dotenv not installed, skip loading
 
 if __name__ == "__main__":
     # set the root to the VS Code workspace folder when launching from your fork
     root = os.environ.get("AGENT_PROJECT_ROOT", os.getcwd())
     print(f"AI agent jailed to: {root}")
-    uvicorn.run("server.api:app", host="127.0.0.1", port=3111, reload=False)
+    # uvloop/httptools come with uvicorn[standard]; uvloop isn't available on Windows
+    uvicorn.run(
+        "server.api:app", host="127.0.0.1", port=3111, reload=False,
+        loop="uvloop" if find_spec("uvloop") else "auto",
+        http="httptools" if find_spec("httptools") else "auto",
+        workers=int(os.environ.get("AGENT_WORKERS", "1")),
+    )
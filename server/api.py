@@ -1,40 +1,88 @@
 from __future__ import annotations
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, ConfigDict
+from typing import TYPE_CHECKING, Any
 import sys
 from pathlib import Path
-import os
+import os, json, queue, threading
 
-# Load environment variables from .env file
-try:
-    from dotenv import load_dotenv
-    load_dotenv()
-except ImportError:
-    pass  # python-dotenv not installed, skip loading
-
-from agent.config import AgentConfig
-from agent.tools.executor import Executor
+# Load environment variables from .env file (AGENT_LOAD_DOTENV=0 skips the lookup, e.g. in containers)
+if os.environ.get("AGENT_LOAD_DOTENV", "1") == "1":
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass  # python-dotenv not installed, skip loading
 
-app = FastAPI(title="VSCode AI Agent", version="0.1.0")
+if TYPE_CHECKING:
+    from agent.tools.executor import Executor
 
-class DispatchIn(BaseModel):
-    kind: str
-    args: dict = {}
+# set by lifespan; a module global keeps the per-request lookup off app.state
+_EXEC: Executor | None = None
 
-@app.on_event("startup")
-def startup():
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global _EXEC
+    # imported here rather than at module load, so importing the app (and reloads) stay cheap
+    from agent.config import AgentConfig
+    from agent.tools.executor import Executor
     project_root = os.environ.get("AGENT_PROJECT_ROOT", os.getcwd())
     shell = os.environ.get("AGENT_SHELL", "bash")
     app.state.cfg = AgentConfig(project_root=Path(project_root), shell=shell).resolve()
-    app.state.exec = Executor(app.state.cfg)
+    _EXEC = app.state.exec = Executor(app.state.cfg)
+    try:
+        yield
+    finally:
+        _EXEC.close()
+
+# orjson serializes the (possibly large) tool results much faster than stdlib json
+app = FastAPI(title="VSCode AI Agent", version="0.1.0", default_response_class=ORJSONResponse,
+              lifespan=lifespan)
+
+class DispatchIn(BaseModel):
+    # args is handed to the tool as-is: Any values skip per-item validation, unknown fields are dropped
+    model_config = ConfigDict(extra="ignore")
+    kind: str
+    args: dict[str, Any] = {}
 
 @app.post("/dispatch")
 def dispatch(inp: DispatchIn):
     try:
-        return {"result": app.state.exec.dispatch(inp.kind, inp.args)}
+        return {"result": _EXEC.dispatch(inp.kind, inp.args)}
     except Exception as e:
         raise HTTPException(400, detail=str(e))
 
+@app.post("/dispatch/stream")
+def dispatch_stream(inp: DispatchIn):
+    # Server-sent events for edit.suggest: "token" events while the diff is generated,
+    # then a single "result" (or "error") event.
+    if inp.kind != "edit.suggest":
+        raise HTTPException(400, detail=f"streaming not supported for: {inp.kind}")
+    events = queue.Queue()
+
+    def run():
+        try:
+            args = {**inp.args, "on_token": lambda t: events.put(("token", t))}
+            events.put(("result", _EXEC.dispatch(inp.kind, args)))
+        except Exception as e:
+            events.put(("error", str(e)))
+
+    threading.Thread(target=run, daemon=True).start()
+
+    def stream():
+        while True:
+            event, data = events.get()
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+            if event != "token":
+                break
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+# serialized once; the probe is answered without touching the JSON encoder
+_HEALTH = Response(content=b'{"ok":true}', media_type="application/json")
+
 @app.get("/health")
 def health():
-    return {"ok": True}
+    return _HEALTH
@@ -0,0 +1,58 @@
+"""
+Discount rule arithmetic for the supermarket checkout.
+
+Kept in its own fully annotated module so it can be compiled ahead of time
+with mypyc (`mypyc _discount.py` next to this file); the extension module is
+then imported in place of this source, which remains the pure-Python fallback.
+"""
+
+from typing import Callable, Optional
+
+
+def compile_rule(rule_type: str, params: dict) -> Callable[[float, float], float]:
+    """Return a (quantity, unit_price) -> discount function with the rule's parameters bound."""
+    if rule_type == 'buy_x_get_y':
+        return _buy_x_get_y(params.get('buy_x', 1), params.get('get_y', 0))
+    if rule_type == 'bulk':
+        return _bulk(params.get('min_quantity', 0), params.get('discount_price'))  # defaults to the unit price
+    if rule_type == 'percentage':
+        return _percentage(params.get('percentage', 0), params.get('min_quantity', 0))
+    return _no_discount
+
+
+def _buy_x_get_y(buy_x: float, get_y: float) -> Callable[[float, float], float]:
+    group = buy_x + get_y
+    if group == 0:
+        # degenerate rule: keep the guard so it only fails once the threshold is met
+        def calc(quantity: float, unit_price: float) -> float:
+            if quantity >= buy_x:
+                return (quantity // group) * get_y * unit_price
+            return 0.0
+    elif get_y == 0:
+        calc = _no_discount  # nothing free, whatever the quantity
+    else:
+        # the bool factor stands in for the threshold branch
+        def calc(quantity: float, unit_price: float) -> float:
+            return (quantity >= buy_x) * ((quantity // group) * get_y * unit_price)
+    return calc
+
+
+def _bulk(min_quantity: float, discount_price: Optional[float]) -> Callable[[float, float], float]:
+    def calc(quantity: float, unit_price: float) -> float:
+        if quantity >= min_quantity:
+            price = unit_price if discount_price is None else discount_price
+            return (unit_price - price) * quantity
+        return 0.0
+    return calc
+
+
+def _percentage(percentage: float, min_quantity: float) -> Callable[[float, float], float]:
+    def calc(quantity: float, unit_price: float) -> float:
+        if quantity >= min_quantity:
+            return (unit_price * quantity * percentage) / 100
+        return 0.0
+    return calc
+
+
+def _no_discount(quantity: float, unit_price: float) -> float:
+    return 0.0
@@ -1,5 +1,17 @@
 import sys
 
+LOREM = (
+    "Lorem ipsum dolor sit amet, consectetur adipiscing elit. "
+    "Sed do eiusmod tempor incididunt ut labore et dolore magna aliqua. "
+    "Ut enim ad minim veniam, quis nostrud exercitation ullamco laboris "
+    "nisi ut aliquip ex ea commodo consequat. Duis aute irure dolor in "
+    "reprehenderit in voluptate velit esse cillum dolore eu fugiat nulla "
+    "pariatur. Excepteur sint occaecat cupidatat non proident, sunt in "
+    "culpa qui officia deserunt mollit anim id est laborum."
+)
+# encoded once, so main() writes the bytes straight to the binary stdout
+LOREM_BYTES = LOREM.encode() + b"\n"
+
 
 def print_lorem_ipsum():
     """
@@ -8,16 +20,7 @@ def print_lorem_ipsum():
     Returns:
         str: The Lorem Ipsum text
     """
-    lorem_text = (
-        "Lorem ipsum dolor sit amet, consectetur adipiscing elit. "
-        "Sed do eiusmod tempor incididunt ut labore et dolore magna aliqua. "
-        "Ut enim ad minim veniam, quis nostrud exercitation ullamco laboris "
-        "nisi ut aliquip ex ea commodo consequat. Duis aute irure dolor in "
-        "reprehenderit in voluptate velit esse cillum dolore eu fugiat nulla "
-        "pariatur. Excepteur sint occaecat cupidatat non proident, sunt in "
-        "culpa qui officia deserunt mollit anim id est laborum."
-    )
-    return lorem_text
+    return LOREM
 
 
 def main():
@@ -27,8 +30,12 @@ def main():
     """
     try:
         # Print the Lorem Ipsum text
-        text = print_lorem_ipsum()
-        print(text)
+        out = getattr(sys.stdout, "buffer", None)
+        if out is not None:
+            out.write(LOREM_BYTES)
+            out.flush()
+        else:
+            print(print_lorem_ipsum())
         
         # Exit successfully
         sys.exit(0)
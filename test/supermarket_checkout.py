@@ -3,47 +3,110 @@ Supermarket Checkout System
 Handles scanning items, calculating totals, applying discounts, and processing payments.
 """
 
-import json
-from typing import Dict, List, Optional, Union
+import copy
+import mmap
+import os
+import sys
+import threading
+from collections import defaultdict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Union
 
+try:
+    import orjson as _json  # optional, much faster parser; loads() takes bytes
+except ImportError:
+    import json as _json
 
+try:
+    import numpy as np  # optional: cart totals as one vectorized reduction
+except ImportError:
+    np = None
+
+try:
+    import simdjson  # optional On-Demand parser: only the fields read are materialized
+except ImportError:
+    simdjson = None
+
+try:
+    from _discount import compile_rule  # mypyc-compiled when built, plain Python otherwise
+except ImportError:
+    # this directory isn't on sys.path: load the sibling module, a compiled build still first
+    import importlib.machinery
+    import importlib.util
+    _spec = importlib.machinery.PathFinder.find_spec('_discount', [os.path.dirname(os.path.abspath(__file__))])
+    if _spec is None:
+        raise
+    _discount = importlib.util.module_from_spec(_spec)
+    sys.modules['_discount'] = _discount
+    _spec.loader.exec_module(_discount)
+    compile_rule = _discount.compile_rule
+
+
+# inventories at least this big are mapped rather than read when simdjson parses them
+MMAP_MIN_BYTES = 1 << 20
+
+
+def _plain(value):
+    """Deep-convert simdjson Object/Array proxies to dicts/lists; other values pass through."""
+    if simdjson is not None:
+        if isinstance(value, simdjson.Object):
+            return value.as_dict()
+        if isinstance(value, simdjson.Array):
+            return value.as_list()
+    return value
+
+
+def _intern(sku):
+    """Intern string SKUs; other keys (e.g. numeric SKUs) are returned unchanged."""
+    return sys.intern(sku) if type(sku) is str else sku
+
+
+@dataclass(slots=True, frozen=True)
 class Product:
-    """Represents a product in the supermarket inventory."""
+    """
+    Represents a product in the supermarket inventory.
     
-    def __init__(self, sku: str, name: str, price: float, unit: str = "each"):
-        """
-        Initialize a product.
-        
-        Args:
-            sku: Stock Keeping Unit (unique identifier)
-            name: Product name
-            price: Price per unit
-            unit: Unit of measurement (each, kg, liter, etc.)
-        """
-        self.sku = sku
-        self.name = name
-        self.price = price
-        self.unit = unit
+    Attributes:
+        sku: Stock Keeping Unit (unique identifier)
+        name: Product name
+        price: Price per unit
+        unit: Unit of measurement (each, kg, liter, etc.)
+    """
+    sku: str
+    name: str
+    price: float
+    unit: str = "each"
     
     def __repr__(self):
         return f"Product({self.sku}, '{self.name}', {self.price}, '{self.unit}')"
 
 
+@dataclass(slots=True)
 class Discount:
-    """Represents a discount rule for products."""
+    """
+    Represents a discount rule for products.
     
-    def __init__(self, sku: str, rule_type: str, **kwargs):
-        """
-        Initialize a discount rule.
-        
-        Args:
-            sku: Product SKU this discount applies to
-            rule_type: Type of discount ('buy_x_get_y', 'bulk', 'percentage')
-            kwargs: Additional parameters based on rule_type
-        """
-        self.sku = sku
-        self.rule_type = rule_type
-        self.params = kwargs
+    Attributes:
+        sku: Product SKU this discount applies to
+        rule_type: Type of discount ('buy_x_get_y', 'bulk', 'percentage')
+        params: Additional parameters based on rule_type
+    
+    The rule is compiled once at construction into a closure over its parameters,
+    so params are read at that point; build a new Discount to change them.
+    """
+    sku: str
+    rule_type: str
+    params: dict = field(default_factory=dict)
+    _calc: Callable[[int, float], float] = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        self._calc = self._compile(self.rule_type, self.params)
+    
+    @staticmethod
+    def _compile(rule_type: str, params: dict) -> Callable[[int, float], float]:
+        """Return a (quantity, unit_price) -> discount function with the rule's parameters bound."""
+        return compile_rule(rule_type, params)
     
     def calculate_discount(self, quantity: int, unit_price: float) -> float:
         """
@@ -56,30 +119,77 @@ class Discount:
         Returns:
             Discount amount
         """
-        if self.rule_type == 'buy_x_get_y':
-            buy_x = self.params.get('buy_x', 1)
-            get_y = self.params.get('get_y', 0)
-            if quantity >= buy_x:
-                free_items = (quantity // (buy_x + get_y)) * get_y
-                return free_items * unit_price
-        
-        elif self.rule_type == 'bulk':
-            min_quantity = self.params.get('min_quantity', 0)
-            discount_price = self.params.get('discount_price', unit_price)
-            if quantity >= min_quantity:
-                return (unit_price - discount_price) * quantity
-        
-        elif self.rule_type == 'percentage':
-            percentage = self.params.get('percentage', 0)
-            if quantity >= self.params.get('min_quantity', 0):
-                return (unit_price * quantity * percentage) / 100
-        
-        return 0.0
+        return self._calc(quantity, unit_price)
+
+
+class _Watched:
+    """Mixin for dict types: calls on_change after every mutation, so derived data can be rebuilt lazily."""
+    __slots__ = ()
+    
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._on_change()
+    
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._on_change()
+    
+    def __ior__(self, other):
+        super().__ior__(other)
+        self._on_change()
+        return self
+    
+    def clear(self):
+        super().clear()
+        self._on_change()
+    
+    def pop(self, *args):
+        value = super().pop(*args)
+        self._on_change()
+        return value
+    
+    def popitem(self):
+        item = super().popitem()
+        self._on_change()
+        return item
+    
+    def setdefault(self, key, default=None):
+        value = super().setdefault(key, default)
+        self._on_change()
+        return value
+    
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self._on_change()
+
+
+class _WatchedDict(_Watched, dict):
+    __slots__ = ('_on_change',)
+    
+    def __init__(self, on_change: Callable[[], None], *args):
+        dict.__init__(self, *args)
+        self._on_change = on_change
+
+
+class _WatchedCart(_Watched, defaultdict):
+    """defaultdict(int) cart; scans write through _add, which skips on_change."""
+    __slots__ = ('_on_change',)
+    
+    def __init__(self, on_change: Callable[[], None], *args):
+        defaultdict.__init__(self, int, *args)
+        self._on_change = on_change
+    
+    def _add(self, sku, quantity) -> None:
+        dict.__setitem__(self, sku, dict.get(self, sku, 0) + quantity)
 
 
 class SupermarketCheckout:
     """Main checkout system class."""
     
+    # one simdjson parser per thread, so its tape buffer is recycled across loads;
+    # a parser can only hold one live document, hence not shared between threads
+    _parsers = threading.local()
+    
     def __init__(self, inventory_file: Optional[str] = None):
         """
         Initialize checkout system.
@@ -87,6 +197,17 @@ class SupermarketCheckout:
         Args:
             inventory_file: Path to JSON file containing inventory data
         """
+        # dense per-product layout (see _index_products); arrays only with numpy. Rebuilt on the
+        # next total after products or discounts change; the quantities are resynced from the
+        # cart after it is edited other than by scanning
+        self._index_stale = True
+        self._qty_stale = True
+        self._sku_ids: Dict[str, int] = {}
+        self._prices = None
+        self._qty = None
+        self._discount_for_id: List[Optional[Callable[[int, float], float]]] = []
+        self._discount_ids = None
+        
         self.products: Dict[str, Product] = {}
         self.discounts: Dict[str, Discount] = {}
         self.cart: Dict[str, int] = {}
@@ -94,6 +215,34 @@ class SupermarketCheckout:
         if inventory_file:
             self.load_inventory(inventory_file)
     
+    # the public dicts are properties so that assigning a new dict is noticed too
+    @property
+    def products(self) -> Dict[str, Product]:
+        return self._products
+    
+    @products.setter
+    def products(self, products: Dict[str, Product]) -> None:
+        self._products = _WatchedDict(self._invalidate_index, products)
+        self._index_stale = True
+    
+    @property
+    def discounts(self) -> Dict[str, Discount]:
+        return self._discounts
+    
+    @discounts.setter
+    def discounts(self, discounts: Dict[str, Discount]) -> None:
+        self._discounts = _WatchedDict(self._invalidate_index, discounts)
+        self._index_stale = True
+    
+    @property
+    def cart(self) -> Dict[str, int]:
+        return self._cart
+    
+    @cart.setter
+    def cart(self, cart: Dict[str, int]) -> None:
+        self._cart = _WatchedCart(self._invalidate_qty, cart)  # one probe per scan, no membership test
+        self._qty_stale = True
+    
     def load_inventory(self, file_path: str) -> None:
         """
         Load products and discounts from a JSON file.
@@ -103,35 +252,75 @@ class SupermarketCheckout:
             
         Raises:
             FileNotFoundError: If inventory file doesn't exist
-            json.JSONDecodeError: If file contains invalid JSON
+            ValueError: If file contains invalid JSON
+        """
+        try:
+            st = os.stat(file_path)
+            products, discounts = self._parse_inventory(os.path.abspath(file_path), st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Inventory file '{file_path}' not found")
+        except ValueError:  # JSONDecodeError from either json module, or simdjson's ValueError
+            raise ValueError(f"Invalid JSON in inventory file '{file_path}'")
+        
+        # Products are frozen, so the cached ones are shared; discounts get fresh params dicts,
+        # deep-copied so nested values can't be changed through the cache either
+        self.products.update((product.sku, product) for product in products)
+        self.discounts.update((sku, Discount(sku=sku, rule_type=rule_type, params=copy.deepcopy(dict(params))))
+                              for sku, rule_type, params in discounts)
+    
+    @classmethod
+    def _simdjson_parser(cls):
+        """Return this thread's simdjson parser, or None without simdjson."""
+        if simdjson is None:
+            return None
+        parser = getattr(cls._parsers, 'parser', None)
+        if parser is None:
+            parser = cls._parsers.parser = simdjson.Parser()
+        return parser
+    
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def _parse_inventory(path: str, mtime_ns: int, size: int) -> tuple:
         """
+        Parse an inventory file into (products, discounts) tuples. Keyed on the file's
+        mtime and size as well as its path, so an edited file is parsed again.
+        """
+        parser = SupermarketCheckout._simdjson_parser()
+        raw = None
         try:
-            with open(file_path, 'r') as f:
-                data = json.load(f)
+            # unbuffered: one read of the whole file, no extra copy through a BufferedReader
+            with open(path, 'rb', buffering=0) as f:
+                if parser and size >= MMAP_MIN_BYTES:
+                    raw = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                else:
+                    raw = f.readall()
+            # simdjson hands back lazy proxies that read like dicts/lists
+            data = parser.parse(raw) if parser else _json.loads(raw)
             
             # Load products
+            products = []
             for product_data in data.get('products', []):
-                product = Product(
-                    sku=product_data['sku'],
+                products.append(Product(
+                    sku=_intern(product_data['sku']),
                     name=product_data['name'],
                     price=product_data['price'],
                     unit=product_data.get('unit', 'each')
-                )
-                self.products[product.sku] = product
+                ))
             
-            # Load discounts
+            # Load discounts (params frozen to pairs of plain values: the cached result must stay
+            # immutable and must not hold proxies, which would pin this thread's parser)
+            discounts = []
             for discount_data in data.get('discounts', []):
-                discount = Discount(
-                    sku=discount_data['sku'],
-                    rule_type=discount_data['rule_type'],
-                    **discount_data.get('params', {})
-                )
-                self.discounts[discount.sku] = discount
-                
-        except FileNotFoundError:
-            raise FileNotFoundError(f"Inventory file '{file_path}' not found")
-        except json.JSONDecodeError:
-            raise ValueError(f"Invalid JSON in inventory file '{file_path}'")
+                params = _plain(discount_data.get('params', {}))
+                discounts.append((_intern(discount_data['sku']), discount_data['rule_type'],
+                                  tuple(params.items())))
+            
+            return tuple(products), tuple(discounts)
+        finally:
+            # live proxies pin the shared parser; drop them even if parsing failed
+            data = product_data = discount_data = params = None
+            if isinstance(raw, mmap.mmap):
+                raw.close()
     
     def scan_item(self, sku: str, quantity: int = 1) -> bool:
         """
@@ -144,12 +333,97 @@ class SupermarketCheckout:
         Returns:
             True if item was successfully scanned, False otherwise
         """
-        if sku not in self.products:
+        sku = _intern(sku)  # inventory keys are interned, so lookups hit the identity fast path
+        if self._products.get(sku) is None:
             return False
-            
-        if sku in self.cart:
-            self.cart[sku] += quantity
-        else:
-            self.cart[sku] = quantity
-            
-        return True
\ No newline at end of file
+        
+        self._cart._add(sku, quantity)
+        if not (self._index_stale or self._qty_stale):
+            self._qty[self._sku_ids[sku]] += quantity
+        return True
+
+    def scan_multi(self, items: Dict[str, int]) -> bool:
+        """
+        Scan several items in one call.
+
+        Args:
+            items: Mapping of product SKU to number of items to add
+
+        Returns:
+            True if every item was scanned, False (and nothing added) if any SKU is unknown
+        """
+        if items.keys() - self._products.keys():
+            return False
+
+        add = self._cart._add
+        for sku, quantity in items.items():
+            add(_intern(sku), quantity)
+        if items and not (self._index_stale or self._qty_stale):
+            sku_ids = self._sku_ids
+            ids = np.fromiter((sku_ids[sku] for sku in items), dtype=np.intp, count=len(items))
+            np.add.at(self._qty, ids, np.fromiter(items.values(), dtype=np.float64, count=len(items)))
+        return True
+
+    def calculate_total(self) -> float:
+        """
+        Calculate the cart total after discounts.
+        
+        Returns:
+            Sum of quantity x unit price over the cart, minus each product's discount
+        """
+        discount_total = 0.0
+        if np is not None:
+            if self._index_stale:
+                self._index_products()
+            elif self._qty_stale:
+                self._sync_qty()
+            qty, prices = self._qty, self._prices
+            subtotal = float(qty @ prices)
+            # only discounted products that are actually in the cart; no dict probes
+            ids = self._discount_ids[qty[self._discount_ids] != 0]
+            discount_for_id = self._discount_for_id
+            for i, quantity, price in zip(ids.tolist(), qty[ids].tolist(), prices[ids].tolist()):
+                discount_total += discount_for_id[i](quantity, price)
+            return subtotal - discount_total
+        
+        subtotal = sum(self.products[sku].price * quantity for sku, quantity in self.cart.items())
+        for sku, quantity in self.cart.items():
+            discount = self.discounts.get(sku)
+            if discount is not None:
+                discount_total += discount.calculate_discount(quantity, self.products[sku].price)
+        return subtotal - discount_total
+    
+    def _invalidate_index(self) -> None:
+        self._index_stale = True
+    
+    def _invalidate_qty(self) -> None:
+        self._qty_stale = True
+    
+    def _index_products(self) -> None:
+        """
+        Give every product a dense integer id and lay prices, cart quantities and
+        discount functions out as parallel numpy arrays indexed by it. The dicts
+        stay the public view: calculate_total calls this again after products or
+        discounts change, and scans keep the quantities in step in between.
+        """
+        self._sku_ids = {sku: i for i, sku in enumerate(self._products)}
+        n = len(self._products)
+        self._prices = np.fromiter((p.price for p in self._products.values()), dtype=np.float64, count=n)
+        self._discount_for_id = [None] * n
+        for sku, discount in self._discounts.items():
+            i = self._sku_ids.get(sku)
+            if i is not None:
+                self._discount_for_id[i] = discount.calculate_discount
+        self._discount_ids = np.array([i for i, calc in enumerate(self._discount_for_id) if calc is not None],
+                                      dtype=np.intp)
+        self._index_stale = False
+        self._sync_qty()
+    
+    def _sync_qty(self) -> None:
+        """Rebuild the quantity array from the cart dict after it was edited directly."""
+        cart = self._cart
+        self._qty = np.zeros(len(self._products), dtype=np.float64)
+        if cart:
+            ids = np.fromiter(map(self._sku_ids.__getitem__, cart), dtype=np.intp, count=len(cart))
+            self._qty[ids] = np.fromiter(cart.values(), dtype=np.float64, count=len(cart))
+        self._qty_stale = False
\ No newline at end of file
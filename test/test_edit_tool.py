@@ -0,0 +1,67 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from agent.config import AgentConfig
+from agent.llm import LLM
+from agent.tools.edit import EditTool
+
+
+class ApplyUnifiedDiffTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name).resolve()
+        self.tool = EditTool(AgentConfig(project_root=self.root).resolve(), llm=None)
+        self.original = "".join(f"line{i}\n" for i in range(20))
+        (self.root / "f.txt").write_text(self.original)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_applies_matching_hunk(self):
+        diff = "--- a/f.txt\n+++ b/f.txt\n@@ -3,3 +3,3 @@\n line2\n-line3\n+LINE3\n line4\n"
+        self.assertTrue(self.tool.apply_unified_diff("f.txt", diff)["ok"])
+        self.assertEqual((self.root / "f.txt").read_text(), self.original.replace("line3\n", "LINE3\n"))
+
+    def test_mismatched_context_fails_without_touching_file(self):
+        diff = "--- a/f.txt\n+++ b/f.txt\n@@ -3,3 +3,3 @@\n lineX\n-lineY\n+LINEY\n lineZ\n"
+        result = self.tool.apply_unified_diff("f.txt", diff)
+        self.assertFalse(result["ok"])
+        self.assertIn("error", result)
+        self.assertEqual((self.root / "f.txt").read_text(), self.original)
+
+    def test_headerless_output_is_rebuilt(self):
+        result = self.tool.apply_unified_diff("f.txt", "+only\n+lines\n")
+        self.assertTrue(result["ok"])
+        self.assertEqual((self.root / "f.txt").read_text(), "only\nlines\n")
+
+
+class SuggestTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name).resolve()
+        # no API key: the LLM answers with its offline fallback diff
+        self.tool = EditTool(AgentConfig(project_root=self.root).resolve(), LLM(api_key=None))
+        (self.root / "f.txt").write_text("a\n")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_outside_root_returns_error(self):
+        result = self.tool.suggest_and_apply("../outside.txt", "change it")
+        self.assertFalse(result["ok"])
+        self.assertIn("outside project root", result["error"])
+
+    def test_outside_root_fails_only_its_own_batch_entry(self):
+        results = self.tool.suggest_and_apply_many([
+            {"filename": "../outside.txt", "goal": "change it"},
+            {"filename": "f.txt", "goal": "change it"},
+        ])
+        self.assertEqual(len(results), 2)
+        self.assertFalse(results[0]["ok"])
+        self.assertTrue(results[1]["ok"])
+        self.assertEqual(results[1]["file"], "f.txt")
+
+
+if __name__ == "__main__":
+    unittest.main()
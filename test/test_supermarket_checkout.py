@@ -0,0 +1,96 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import supermarket_checkout as sc
+
+
+class LoadInventoryTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        sc.SupermarketCheckout._parse_inventory.cache_clear()
+
+    def tearDown(self):
+        sc.SupermarketCheckout._parse_inventory.cache_clear()
+        self._tmp.cleanup()
+
+    def _write(self, name, inventory):
+        path = os.path.join(self._tmp.name, name)
+        with open(path, "w") as f:
+            json.dump(inventory, f)
+        return path
+
+    def _check_nested_params(self):
+        nested = self._write("nested.json", {
+            "products": [{"sku": "A", "name": "Apple", "price": 2.0}],
+            "discounts": [{"sku": "A", "rule_type": "percentage",
+                           "params": {"percentage": 50, "tags": ["a", {"b": [1]}]}}],
+        })
+        plain = self._write("plain.json", {"products": [{"sku": "B", "name": "Bread", "price": 1.0}]})
+
+        checkout = sc.SupermarketCheckout(nested)
+        params = checkout.discounts["A"].params
+        self.assertEqual(params["tags"], ["a", {"b": [1]}])
+        self.assertIs(type(params["tags"]), list)
+        self.assertIs(type(params["tags"][1]), dict)
+        checkout.scan_item("A", 2)
+        self.assertEqual(checkout.calculate_total(), 2.0)
+
+        # the cached parse must not keep the parser busy for the next load on this thread
+        self.assertIn("B", sc.SupermarketCheckout(plain).products)
+        # nor hand out nested values that later checkouts would share
+        params["tags"].append("mutated")
+        self.assertEqual(sc.SupermarketCheckout(nested).discounts["A"].params["tags"], ["a", {"b": [1]}])
+
+    def test_nested_discount_params(self):
+        self._check_nested_params()
+
+    def test_nested_discount_params_mmap(self):
+        with mock.patch.object(sc, "MMAP_MIN_BYTES", 0):
+            self._check_nested_params()
+
+
+class TotalsTrackPublicDictsTest(unittest.TestCase):
+    """Totals must follow direct edits of products, discounts and cart, with or without numpy."""
+
+    def _checkout(self):
+        checkout = sc.SupermarketCheckout()
+        checkout.products = {"A": sc.Product("A", "Apple", 1.0), "B": sc.Product("B", "Bread", 2.0)}
+        checkout.scan_item("A", 2)
+        self.assertEqual(checkout.calculate_total(), 2.0)
+        return checkout
+
+    def test_assigned_products(self):
+        checkout = self._checkout()
+        checkout.products = {"A": sc.Product("A", "Apple", 1.0), "N": sc.Product("N", "New", 3.0)}
+        self.assertTrue(checkout.scan_item("N"))
+        self.assertEqual(checkout.calculate_total(), 5.0)
+
+    def test_assigned_discounts(self):
+        checkout = self._checkout()
+        checkout.discounts = {"A": sc.Discount("A", "percentage", {"percentage": 50})}
+        self.assertEqual(checkout.calculate_total(), 1.0)
+        checkout.discounts["B"] = sc.Discount("B", "bulk", {"min_quantity": 1, "discount_price": 1.5})
+        checkout.scan_multi({"B": 2})
+        self.assertEqual(checkout.calculate_total(), 4.0)
+
+    def test_edited_cart(self):
+        checkout = self._checkout()
+        checkout.scan_item("B")
+        checkout.cart.pop("A")
+        self.assertEqual(checkout.calculate_total(), 2.0)
+        checkout.cart = {"A": 1}
+        checkout.scan_item("A")
+        self.assertEqual(checkout.calculate_total(), 2.0)
+
+    def test_without_numpy(self):
+        with mock.patch.object(sc, "np", None):
+            self.test_assigned_products()
+            self.test_assigned_discounts()
+            self.test_edited_cart()
+
+
+if __name__ == "__main__":
+    unittest.main()